@@ -1,8 +1,31 @@
 import time
 from agents.base import Agent
+from agents.transposition import EXACT, LOWER, UPPER, TranspositionTable
 from gomoku.board import BLACK, WHITE
 from gomoku import rules
-from heuristics.evaluate import evaluate, order_moves
+from heuristics.cache import DEFAULT_CACHE_BYTES, FeatureCache
+from heuristics.evaluate import compile_weights, evaluate, order_moves, order_moves_lazy
+from search.vcf import DEFAULT_VCF_NODES, VCFSolver, window_points
+from search.vct import DEFAULT_VCT_NODES, VCTSolver
+
+# default transposition table size (entries, rounded up to a power of two)
+DEFAULT_TT_ENTRIES = 1 << 16
+
+# half-width of the first aspiration window around the previous
+# iteration's value (a live three scores 300)
+DEFAULT_ASPIRATION_WINDOW = 100.0
+
+# plies (root = 0) ordered with the full order_moves pipeline; deeper
+# nodes use the TT move, killer moves and history scores instead
+DEFAULT_FULL_ORDER_PLIES = 2
+
+# killer moves remembered per ply
+KILLER_SLOTS = 2
+
+# share of time_budget_ms the VCF solver may use before the main search,
+# and the further share for the VCT solver when it is enabled
+VCF_TIME_SHARE = 0.25
+VCT_TIME_SHARE = 0.25
 
 
 class _SearchCutoff(Exception):
@@ -13,44 +36,157 @@ class _SearchCutoff(Exception):
 class AlphaBetaAgent(Agent):
     name = "alphabeta"
 
-    def __init__(self, max_depth=2, node_budget=5000, time_budget_ms=200, weights=None):
-        # search limits and eval weights
+    def __init__(
+        self,
+        max_depth=2,
+        node_budget=5000,
+        time_budget_ms=200,
+        weights=None,
+        cache_bytes=DEFAULT_CACHE_BYTES,
+        tt_entries=DEFAULT_TT_ENTRIES,
+        aspiration_window=DEFAULT_ASPIRATION_WINDOW,
+        full_order_plies=DEFAULT_FULL_ORDER_PLIES,
+        use_vcf=True,
+        vcf_nodes=DEFAULT_VCF_NODES,
+        use_vct=False,
+        vct_nodes=DEFAULT_VCT_NODES,
+    ):
+        # search limits, eval weights, feature/eval cache cap, TT size,
+        # aspiration half-width, how many plies get full move ordering and
+        # the VCF/VCT pre-searches
         self.max_depth = max_depth
         self.node_budget = node_budget
         self.time_budget_ms = time_budget_ms
         self.weights = weights
+        self.aspiration_window = aspiration_window
+        self.full_order_plies = full_order_plies
+        self.use_vcf = use_vcf
+        self.use_vct = use_vct
+        self._weights = compile_weights(weights)
+        self._cache = FeatureCache(cache_bytes)  # kept across moves
 
         self._nodes = 0
         self._t0 = 0.0
+        self.depth_nodes = []  # nodes searched when each depth completed
 
-        self._tt = {}  # transposition table
+        # transposition table, kept across moves; values are from the
+        # perspective of _tt_stone, so it is cleared if that changes
+        self._tt = TranspositionTable(tt_entries)
+        self._tt_stone = None
+
+        # cheap ordering state: killer moves per ply (reset every move) and
+        # history scores keyed by (stone, move) (halved every move)
+        self._killers = []
+        self._history = {}
+
+        # threat-space solvers; their proof caches are kept across moves
+        self._vcf = VCFSolver(max_nodes=vcf_nodes)
+        self._vct = VCTSolver(max_nodes=vct_nodes)
 
     def select_move(self, board, stone):
-        # iterative deepening with move ordering
+        # iterative deepening with move ordering and aspiration windows
         moves = board.candidate_moves()
         if not moves:
             raise RuntimeError("No legal moves available (game is over).")
 
-        self._reset_search_state()
-
-        ordered_moves = order_moves(board, moves, stone, self.weights)
+        self._reset_search_state(stone)
+
+        ordered_moves = order_moves(board, moves, stone, self._weights, cache=self._cache)
+        if self.use_vcf:
+            win, ordered_moves = self._threat_root(self._vcf, VCF_TIME_SHARE, board, stone, ordered_moves)
+            if win is not None:
+                return win
+        if self.use_vct:
+            share = VCF_TIME_SHARE + VCT_TIME_SHARE
+            win, ordered_moves = self._threat_root(self._vct, share, board, stone, ordered_moves)
+            if win is not None:
+                return win
         best_move = ordered_moves[0]
+        value = None
 
         for depth in range(1, self.max_depth + 1):
             try:
-                move, _value = self._search_root(board, stone, depth)
+                move, value = self._search_aspiration(board, stone, depth, ordered_moves, value)
                 if move is not None:
                     best_move = move
             except _SearchCutoff:
                 break
+            self.depth_nodes.append(self._nodes)
 
         return best_move
 
-    def _reset_search_state(self):
-        # reset counters and tt
+    def _solve_threat(self, solver, share, board, stone):
+        # solver's line for stone to move, within what is left of the
+        # share of the time budget (measured from the start of the move)
+        budget = self.time_budget_ms * share - self._elapsed_ms()
+        if budget <= 0:
+            return None
+        return solver.solve(board, stone, time_budget_ms=budget)
+
+    def _threat_root(self, solver, share, board, stone, ordered_moves):
+        # run a threat-space solver for both sides before the main search:
+        # our own forced win is played at once; against an opponent win the
+        # root keeps the cells of its line that refute it (a budget-limited
+        # "none" counts) plus our own fours, which force a reply first
+        sequence = self._solve_threat(solver, share, board, stone)
+        if sequence:
+            return sequence[0], ordered_moves
+
+        opp = self._other(stone)
+        threat = self._solve_threat(solver, share, board, opp)
+        if not threat:
+            return None, ordered_moves
+
+        threat_cells = set(threat)
+        fours = {divmod(idx, board.size) for idx in window_points(board, stone, 3)}
+        defenses = []
+        for move in ordered_moves:
+            if move in threat_cells:
+                board.push(move, stone)
+                try:
+                    refuted = self._solve_threat(solver, share, board, opp) is None
+                finally:
+                    board.pop()
+                if refuted:
+                    defenses.append(move)
+            elif move in fours:
+                defenses.append(move)
+
+        if not any(move in threat_cells for move in defenses):
+            # nothing stops it: lost against best play, search everything
+            return None, ordered_moves
+        return None, defenses
+
+    def _search_aspiration(self, board, stone, depth, ordered_moves, guess):
+        # search a window around the previous iteration's value, widening
+        # the failing side and re-searching until the value falls inside
+        if guess is None:
+            return self._search_root(board, stone, depth, ordered_moves)
+
+        delta = float(self.aspiration_window)
+        alpha = guess - delta
+        beta = guess + delta
+        while True:
+            move, value = self._search_root(board, stone, depth, ordered_moves, alpha, beta)
+            if value <= alpha:
+                alpha = value - delta
+            elif value >= beta:
+                beta = value + delta
+            else:
+                return move, value
+            delta *= 4
+
+    def _reset_search_state(self, stone):
+        # reset counters and age the tt
         self._nodes = 0
+        self.depth_nodes = []
         self._t0 = time.perf_counter()
-        self._tt = {}
+        if stone != self._tt_stone:
+            self._tt.clear()
+            self._tt_stone = stone
+        self._tt.new_search()
+        self._killers = []
+        self._history = {key: score // 2 for key, score in self._history.items() if score > 1}
 
     def _other(self, stone):
         return WHITE if stone == BLACK else BLACK
@@ -73,151 +209,177 @@ class AlphaBetaAgent(Agent):
         self._nodes += 1
         self._check_budget()
 
-    def _board_key(self, board, current_turn, depth):
-        # key for transposition table
-        grid_key = tuple(tuple(row) for row in board.grid)
-        return (grid_key, current_turn, depth)
+    def _lookup_tt(self, board, current_turn):
+        # (depth, flag, value, move) stored for this position, or None
+        return self._tt.probe(board.hash, current_turn, board.stone_count)
 
-    def _lookup_tt(self, board, current_turn, depth):
-        # retrieve cached value if depth sufficient
-        key = self._board_key(board, current_turn, depth)
-        entry = self._tt.get(key)
-        if entry is None:
-            return None
+    def _store_tt(self, board, current_turn, depth, flag, value, move):
+        # store a search result with its bound flag and best move
+        self._tt.store(board.hash, current_turn, board.stone_count, depth, flag, value, move)
 
-        stored_depth, stored_value = entry
-        if stored_depth >= depth:
-            return stored_value
-        return None
-
-    def _store_tt(self, board, current_turn, depth, value):
-        # store value if deeper
-        key = self._board_key(board, current_turn, depth)
-        old = self._tt.get(key)
-        if old is None or old[0] < depth:
-            self._tt[key] = (depth, value)
-
-    def _search_root(self, board, stone, depth):
-        # root search (max node)
+    def _tt_first(self, board, moves, tt_move):
+        # yield the stored best move first, then the rest in their order
+        if tt_move is not None and board.is_empty(tt_move):
+            yield tt_move
+        for move in moves:
+            if move != tt_move:
+                yield move
+
+    def _killer_slots(self, ply):
+        # killer moves for ply, most recent first
+        killers = self._killers
+        while len(killers) <= ply:
+            killers.append([])
+        return killers[ply]
+
+    def _cheap_order(self, moves, current_turn, ply):
+        # killers for this ply first, then the rest by history score (ties
+        # keep candidate order); no pattern scan
+        history = self._history
+        killers = [m for m in self._killer_slots(ply) if m in moves]
+        rest = [m for m in moves if m not in killers]
+        rest.sort(key=lambda m: history.get((current_turn, m), 0), reverse=True)
+        return killers + rest
+
+    def _record_cutoff(self, current_turn, move, depth, ply):
+        # move refuted this node: remember it as a killer for the ply and
+        # weight its history by the remaining depth
+        killers = self._killer_slots(ply)
+        if move in killers:
+            killers.remove(move)
+        killers.insert(0, move)
+        del killers[KILLER_SLOTS:]
+        key = (current_turn, move)
+        self._history[key] = self._history.get(key, 0) + depth * depth
+
+    def _leaf_value(self, board, root_stone, current_turn):
+        # static evaluation from current_turn's perspective; always
+        # evaluated for root_stone so the cache keeps a single perspective
+        value = evaluate(board, root_stone, self._weights, cache=self._cache)
+        return value if current_turn == root_stone else -value
+
+    def _search_root(self, board, stone, depth, ordered_moves, alpha=float("-inf"), beta=float("inf")):
+        # root search; returns the best move and its fail-soft value
         self._check_budget()
 
-        moves = board.candidate_moves()
-        if not moves:
-            return None, evaluate(board, stone, self.weights)
+        if not ordered_moves:
+            return None, self._leaf_value(board, stone, stone)
 
-        moves = order_moves(board, moves, stone, self.weights)
+        entry = self._lookup_tt(board, stone)
+        tt_move = entry[3] if entry is not None else None
+        moves = list(self._tt_first(board, ordered_moves, tt_move))
 
+        alpha_orig = alpha
         best_move = None
         best_value = float("-inf")
-        alpha = float("-inf")
-        beta = float("inf")
 
         for move in moves:
             self._check_budget()
 
-            child = board.copy()
-            if not child.place(move, stone):
+            if not board.push(move, stone):
                 continue
 
-            value = self._search_value(
-                board=child,
-                root_stone=stone,
-                current_turn=self._other(stone),
-                depth=depth - 1,
-                alpha=alpha,
-                beta=beta,
-            )
+            try:
+                value = self._pvs(board, stone, self._other(stone), depth - 1, 1, alpha, beta, best_move is None)
+            finally:
+                board.pop()
 
             if value > best_value:
                 best_value = value
                 best_move = move
-
-            alpha = max(alpha, value)
+                if value >= beta:
+                    break
+                alpha = max(alpha, value)
 
         if best_move is None:
-            return moves[0], evaluate(board, stone, self.weights)
+            return moves[0], self._leaf_value(board, stone, stone)
 
+        self._store_tt(board, stone, depth, self._bound_flag(best_value, alpha_orig, beta), best_value, best_move)
         return best_move, best_value
 
-    def _search_value(self, board, root_stone, current_turn, depth, alpha, beta):
-        # alpha-beta recursion:
+    def _pvs(self, board, root_stone, current_turn, depth, ply, alpha, beta, first):
+        # value of a child (just pushed) from its parent's perspective: the
+        # first move gets the full window, later ones a null-window scout at
+        # alpha, re-searched with the full window if they beat it
+        if first:
+            return -self._search_value(board, root_stone, current_turn, depth, ply, -beta, -alpha)
+
+        value = -self._search_value(board, root_stone, current_turn, depth, ply, -alpha, -alpha)
+        if alpha < value < beta:
+            value = -self._search_value(board, root_stone, current_turn, depth, ply, -beta, -value)
+        return value
+
+    def _bound_flag(self, value, alpha, beta):
+        # a fail-high is checked first: with a null window alpha == beta
+        if value >= beta:
+            return LOWER
+        if value <= alpha:
+            return UPPER
+        return EXACT
+
+    def _search_value(self, board, root_stone, current_turn, depth, ply, alpha, beta):
+        # negamax alpha-beta with PVS (values from current_turn's perspective):
         # 1. check budget and count node
         # 2. if terminal or depth==0 -> evaluate and return
-        # 3. lookup TT, return if hit
-        # 4. generate and order moves
-        # 5. recurse:
-        #    - max node: maximize value, update alpha
-        #    - min node: minimize value, update beta
+        # 3. probe TT: exact hits and bounds outside the window return
+        # 4. order moves: TT move first, then staged ordering at shallow
+        #    plies or killers and history scores deeper down
+        # 5. recurse: full window on the first move, null-window scouts
+        #    (re-searched on fail high) on the rest
         # 6. prune when alpha >= beta
-        # 7. store in TT and return value
+        # 7. on a cutoff, record a killer and bump the move's history
+        # 8. store the fail-soft value with its bound flag and best move
         self._count_node_and_check_budget()
 
-        winner = rules.winner(board.grid)
-        if depth == 0 or winner is not None or rules.is_terminal(board.grid):
-            value = evaluate(board, root_stone, self.weights)
-            self._store_tt(board, current_turn, depth, value)
-            return value
-
-        cached = self._lookup_tt(board, current_turn, depth)
-        if cached is not None:
-            return cached
+        if depth == 0 or rules.status(board) != rules.ONGOING:
+            return self._leaf_value(board, root_stone, current_turn)
+
+        tt_move = None
+        entry = self._lookup_tt(board, current_turn)
+        if entry is not None:
+            stored_depth, flag, stored_value, tt_move = entry
+            if stored_depth >= depth:
+                if flag == EXACT:
+                    return stored_value
+                if flag == LOWER and stored_value >= beta:
+                    return stored_value
+                if flag == UPPER and stored_value <= alpha:
+                    return stored_value
 
         moves = board.candidate_moves()
         if not moves:
-            value = evaluate(board, root_stone, self.weights)
-            self._store_tt(board, current_turn, depth, value)
-            return value
-
-        moves = order_moves(board, moves, current_turn, self.weights)
-
-        if current_turn == root_stone:
-            # max node
-            value = float("-inf")
-            for move in moves:
-                self._check_budget()
-
-                child = board.copy()
-                if not child.place(move, current_turn):
-                    continue
-
-                child_value = self._search_value(
-                    board=child,
-                    root_stone=root_stone,
-                    current_turn=self._other(current_turn),
-                    depth=depth - 1,
-                    alpha=alpha,
-                    beta=beta,
-                )
+            return self._leaf_value(board, root_stone, current_turn)
 
-                value = max(value, child_value)
-                alpha = max(alpha, value)
-
-                if alpha >= beta:
-                    break
+        if ply < self.full_order_plies:
+            # staged generator: a cutoff on an early move skips the later stages
+            moves = order_moves_lazy(board, moves, current_turn, self._weights, cache=self._cache)
         else:
-            # min node
-            value = float("inf")
-            for move in moves:
-                self._check_budget()
-
-                child = board.copy()
-                if not child.place(move, current_turn):
-                    continue
-
-                child_value = self._search_value(
-                    board=child,
-                    root_stone=root_stone,
-                    current_turn=self._other(current_turn),
-                    depth=depth - 1,
-                    alpha=alpha,
-                    beta=beta,
-                )
+            moves = self._cheap_order(moves, current_turn, ply)
+        moves = self._tt_first(board, moves, tt_move)
 
-                value = min(value, child_value)
-                beta = min(beta, value)
+        alpha_orig = alpha
+        best_move = None
+        best_value = float("-inf")
+        for move in moves:
+            self._check_budget()
 
-                if alpha >= beta:
+            if not board.push(move, current_turn):
+                continue
+
+            try:
+                value = self._pvs(
+                    board, root_stone, self._other(current_turn), depth - 1, ply + 1, alpha, beta, best_move is None
+                )
+            finally:
+                board.pop()
+
+            if value > best_value:
+                best_value = value
+                best_move = move
+                if value >= beta:
+                    self._record_cutoff(current_turn, move, depth, ply)
                     break
+                alpha = max(alpha, value)
 
-        self._store_tt(board, current_turn, depth, value)
-        return value
\ No newline at end of file
+        self._store_tt(board, current_turn, depth, self._bound_flag(best_value, alpha_orig, beta), best_value, best_move)
+        return best_value
@@ -13,17 +13,19 @@ class GreedyAgent(Agent):
 
         # Immediate win
         for m in moves:
-            b2 = board.copy()
-            b2.place(m, stone)
-            if rules.winner(b2.grid) == stone:
+            board.push(m, stone)
+            won = rules.winner(board) == stone
+            board.pop()
+            if won:
                 return m
 
         # Immediate block
         opp = WHITE if stone == BLACK else BLACK
         for m in moves:
-            b2 = board.copy()
-            b2.place(m, opp)
-            if rules.winner(b2.grid) == opp:
+            board.push(m, opp)
+            lost = rules.winner(board) == opp
+            board.pop()
+            if lost:
                 return m
 
         # Prefer center (Manhattan distance), deterministic tie-break
@@ -1,19 +1,28 @@
 import random
 from agents.base import Agent
 from gomoku import rules
-from heuristics.features import extract_features, featurize_after_move
+from heuristics.cache import DEFAULT_CACHE_BYTES, FeatureCache
 
 
 class RLAgent(Agent):
     name = "rl"
 
-    def __init__(self, weights=None, alpha=0.01, gamma=0.99, epsilon=0.1, seed=0):
-        # linear Q params + epsilon-greedy
+    def __init__(
+        self,
+        weights=None,
+        alpha=0.01,
+        gamma=0.99,
+        epsilon=0.1,
+        seed=0,
+        cache_bytes=DEFAULT_CACHE_BYTES,
+    ):
+        # linear Q params + epsilon-greedy + feature cache
         self.weights = dict(weights or {})
         self.alpha = float(alpha)
         self.gamma = float(gamma)
         self.epsilon = float(epsilon)
         self._rng = random.Random(seed)
+        self._cache = FeatureCache(cache_bytes)
 
     def select_move(self, board, stone):
         # epsilon-greedy with win check
@@ -23,8 +32,11 @@ class RLAgent(Agent):
 
         # take immediate win
         for move in moves:
-            b = board.copy()
-            if b.place(move, stone) and rules.winner(b.grid) == stone:
+            if not board.push(move, stone):
+                continue
+            won = rules.winner(board) == stone
+            board.pop()
+            if won:
                 return move
 
         # explore
@@ -43,8 +55,8 @@ class RLAgent(Agent):
 
     def q_value(self, board, stone, move):
         # linear Q(s,a) with heuristic shaping
-        before = extract_features(board, stone)
-        after = featurize_after_move(board, stone, move)
+        before = self._cache.features(board, stone)
+        after = self._features_after_move(board, stone, move)
 
         q = 0.0
         for k, v in after.items():
@@ -93,6 +105,14 @@ class RLAgent(Agent):
 
         return float(q)
 
+    def _features_after_move(self, board, stone, move):
+        # cached features of board after stone plays move
+        if not board.push(move, stone):
+            return self._cache.features(board, stone)
+        feats = self._cache.features(board, stone)
+        board.pop()
+        return feats
+
     def best_q(self, board, stone):
         # max Q over actions
         moves = board.candidate_moves()
@@ -102,7 +122,7 @@ class RLAgent(Agent):
 
     def update(self, board, stone, move, reward, next_board, next_stone, done):
         # Q-learning update (linear approx)
-        feats = featurize_after_move(board, stone, move)
+        feats = self._features_after_move(board, stone, move)
 
         current_q = 0.0
         for k, v in feats.items():
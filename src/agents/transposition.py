@@ -0,0 +1,68 @@
+from gomoku.board import WHITE
+
+# bound flags: the stored value is exact, a lower bound (fail high)
+# or an upper bound (fail low)
+EXACT = 0
+LOWER = 1
+UPPER = 2
+
+# mixed into the hash so both sides to move don't share a slot
+_WHITE_TO_MOVE = 0x9E3779B97F4A7C15
+
+
+class TranspositionTable:
+    # Fixed-size table indexed by Zobrist hash. Each slot holds one entry
+    # (hash, turn, check, depth, flag, value, move, generation); check is
+    # the stone count, to reject hash collisions. A store replaces the
+    # slot's entry if that is empty, for the same position, left over
+    # from an older search (aging), or searched no deeper (depth-preferred).
+
+    def __init__(self, entries=1 << 16):
+        # round the entry count up to a power of two for mask indexing
+        size = 1
+        while size < entries:
+            size <<= 1
+        self._mask = size - 1
+        self._slots = [None] * size
+        self._used = 0
+        self.generation = 0
+
+    def __len__(self):
+        return self._used
+
+    @property
+    def capacity(self):
+        return len(self._slots)
+
+    def clear(self):
+        # drop every entry
+        self._slots = [None] * len(self._slots)
+        self._used = 0
+
+    def new_search(self):
+        # start a new search; older entries become replaceable
+        self.generation += 1
+
+    def _index(self, h, turn):
+        return (h ^ _WHITE_TO_MOVE if turn == WHITE else h) & self._mask
+
+    def probe(self, h, turn, check):
+        # return (depth, flag, value, move) for the position, or None
+        entry = self._slots[self._index(h, turn)]
+        if entry is None or entry[0] != h or entry[1] != turn or entry[2] != check:
+            return None
+        return entry[3], entry[4], entry[5], entry[6]
+
+    def store(self, h, turn, check, depth, flag, value, move):
+        # store a search result, subject to the replacement policy
+        i = self._index(h, turn)
+        old = self._slots[i]
+        if old is None:
+            self._used += 1
+        elif not (
+            old[7] != self.generation
+            or (old[0] == h and old[1] == turn and old[2] == check)
+            or old[3] <= depth
+        ):
+            return
+        self._slots[i] = (h, turn, check, depth, flag, value, move, self.generation)
@@ -1,21 +1,140 @@
+import base64
+import random
+
 BOARD_SIZE = 15
 WIN_LENGTH = 5
 BLACK = "X"
 WHITE = "O"
 EMPTY = " "
 
+# Byte codes used by the flat cell buffer
+CELL_CODES = {EMPTY: 0, BLACK: 1, WHITE: 2}
+CODE_STONES = {1: BLACK, 2: WHITE}
+
+# Directions of the four lines through a cell: row, column, '\' and '/'
+DIRECTIONS = ((0, 1), (1, 0), (1, 1), (1, -1))
+
+# Fixed seed so hashes are reproducible across runs and processes
+ZOBRIST_SEED = 0x9E3779B97F4A7C15
+
+_ZOBRIST = {}
+
+
+def zobrist_table(size):
+    # Return cached per-cell 64-bit keys for each stone on a size x size board
+    table = _ZOBRIST.get(size)
+    if table is None:
+        rng = random.Random(ZOBRIST_SEED + size)
+        table = {
+            BLACK: [rng.getrandbits(64) for _ in range(size * size)],
+            WHITE: [rng.getrandbits(64) for _ in range(size * size)],
+        }
+        _ZOBRIST[size] = table
+    return table
+
+
+_COORDS = {}
+_NEIGHBOURS = {}
+
+
+def coord_table(size):
+    # Return cached (row, col) tuples indexed by flat cell index
+    table = _COORDS.get(size)
+    if table is None:
+        table = [(r, c) for r in range(size) for c in range(size)]
+        _COORDS[size] = table
+    return table
+
+
+def neighbour_table(size, radius):
+    # Return cached flat indices within Chebyshev distance radius of each cell
+    key = (size, radius)
+    table = _NEIGHBOURS.get(key)
+    if table is None:
+        table = []
+        for r in range(size):
+            for c in range(size):
+                table.append([
+                    nr * size + nc
+                    for nr in range(max(0, r - radius), min(size, r + radius + 1))
+                    for nc in range(max(0, c - radius), min(size, c + radius + 1))
+                    if (nr, nc) != (r, c)
+                ])
+        _NEIGHBOURS[key] = table
+    return table
+
+
+# Radii whose candidate frontier is maintained incrementally on place/pop
+FRONTIER_RADII = (1, 2)
+
 
 class Board:
     def __init__(self, size=BOARD_SIZE):
         # Initialize an empty board
         self.size = size
         self._grid = [[EMPTY] * size for _ in range(size)]
+        self._cells = bytearray(size * size)
+        self._cells_view = memoryview(self._cells).toreadonly()
         self.last_move = None
+        self._winner = None
+        self._history = []
+        self._zobrist = zobrist_table(size)
+        self._hash = 0
+
+        # Bit i set when flat cell i is occupied
+        self._occupied = 0
+        # Per radius: stone count near each cell, and bitmask of cells with count > 0
+        self._near = {rad: [0] * (size * size) for rad in FRONTIER_RADII}
+        self._zone = dict.fromkeys(FRONTIER_RADII, 0)
+        self._rings = {rad: neighbour_table(size, rad) for rad in FRONTIER_RADII}
+        self._coords = coord_table(size)
+
+        # Derived-state trackers keyed by name; each implements
+        # changed(board, idx) after a cell is set or cleared, and copy()
+        self._trackers = {}
+
+        # Bumped on every push/pop; the grid snapshot is rebuilt lazily
+        self._version = 0
+        self._snapshot = None
+        self._snapshot_version = -1
 
     @property
     def grid(self):
-        # Return an immutable view of the grid
-        return tuple(tuple(row) for row in self._grid)
+        # Return an immutable view of the grid, cached until the next mutation
+        if self._snapshot_version != self._version:
+            self._snapshot = tuple(tuple(row) for row in self._grid)
+            self._snapshot_version = self._version
+        return self._snapshot
+
+    @property
+    def cells(self):
+        # Return a zero-copy read-only flat view of cell codes (see CELL_CODES)
+        return self._cells_view
+
+    @property
+    def version(self):
+        # Return a counter that changes on every mutation
+        return self._version
+
+    @property
+    def winner(self):
+        # Return the stone that completed WIN_LENGTH in a row, if any
+        return self._winner
+
+    @property
+    def hash(self):
+        # Return the 64-bit Zobrist hash of the current position
+        return self._hash
+
+    @property
+    def stone_count(self):
+        # Return the number of stones on the board
+        return len(self._history)
+
+    @property
+    def empty_count(self):
+        # Return the number of empty cells left
+        return self.size * self.size - len(self._history)
 
     def in_bounds(self, move):
         # Check whether move is inside board boundaries
@@ -31,13 +150,94 @@ class Board:
 
     def place(self, move, stone):
         # Place a stone if the move is legal
+        return self.push(move, stone)
+
+    def push(self, move, stone):
+        # Place a stone in place, recording what pop needs to undo it
         if not self.is_empty(move):
             return False
         r, c = move
+        self._history.append((move, self.last_move, self._winner))
         self._grid[r][c] = stone
+        idx = r * self.size + c
+        self._cells[idx] = CELL_CODES[stone]
+        self._version += 1
+        self._hash ^= self._zobrist[stone][idx]
+        self._occupied |= 1 << idx
+        for rad in FRONTIER_RADII:
+            near = self._near[rad]
+            zone = self._zone[rad]
+            for j in self._rings[rad][idx]:
+                near[j] += 1
+                if near[j] == 1:
+                    zone |= 1 << j
+            self._zone[rad] = zone
         self.last_move = move
+        if self._winner is None and self._wins_through(r, c, stone):
+            self._winner = stone
+        if self._trackers:
+            for tracker in self._trackers.values():
+                tracker.changed(self, idx)
         return True
 
+    def pop(self):
+        # Undo the most recent push and return its move
+        move, last_move, winner = self._history.pop()
+        r, c = move
+        idx = r * self.size + c
+        self._hash ^= self._zobrist[self._grid[r][c]][idx]
+        self._grid[r][c] = EMPTY
+        self._cells[idx] = 0
+        self._version += 1
+        self._occupied &= ~(1 << idx)
+        for rad in FRONTIER_RADII:
+            near = self._near[rad]
+            zone = self._zone[rad]
+            for j in self._rings[rad][idx]:
+                near[j] -= 1
+                if near[j] == 0:
+                    zone &= ~(1 << j)
+            self._zone[rad] = zone
+        self.last_move = last_move
+        self._winner = winner
+        if self._trackers:
+            for tracker in self._trackers.values():
+                tracker.changed(self, idx)
+        return move
+
+    def tracker(self, key):
+        # Return the derived-state tracker attached under key, if any
+        return self._trackers.get(key)
+
+    def attach(self, key, tracker):
+        # Attach a tracker that is notified of every push/pop and copied with the board
+        self._trackers[key] = tracker
+
+    def _wins_through(self, r, c, stone):
+        # Check only the four lines through (r, c) for WIN_LENGTH in a row
+        g = self._grid
+        n = self.size
+        for dr, dc in DIRECTIONS:
+            count = 1
+            rr, cc = r + dr, c + dc
+            while 0 <= rr < n and 0 <= cc < n and g[rr][cc] == stone:
+                count += 1
+                rr += dr
+                cc += dc
+            rr, cc = r - dr, c - dc
+            while 0 <= rr < n and 0 <= cc < n and g[rr][cc] == stone:
+                count += 1
+                rr -= dr
+                cc -= dc
+            if count >= WIN_LENGTH:
+                return True
+        return False
+
+    def would_win(self, move, stone):
+        # Return True if stone placed on the empty cell move makes WIN_LENGTH in a row
+        r, c = move
+        return self._wins_through(r, c, stone)
+
     def legal_moves(self):
         # Return all currently legal moves
         return [
@@ -48,7 +248,25 @@ class Board:
         ]
     
     def candidate_moves(self, radius=2):
-        # Return candidate moves near existing stones
+        # Return candidate moves near existing stones, in row-major order
+        if radius not in self._zone:
+            return self._scan_candidate_moves(radius)
+
+        # Opening: prefer center
+        if not self._occupied:
+            return [(self.size // 2, self.size // 2)]
+
+        coords = self._coords
+        mask = self._zone[radius] & ~self._occupied
+        moves = []
+        while mask:
+            low = mask & -mask
+            moves.append(coords[low.bit_length() - 1])
+            mask ^= low
+        return moves
+
+    def _scan_candidate_moves(self, radius):
+        # Full-board scan for radii without a maintained frontier
         stones = []
 
         for r in range(self.size):
@@ -73,11 +291,74 @@ class Board:
 
         return sorted(cand)
 
+    def to_bytes(self):
+        # Pack the position: one size byte, then 2 bits per cell (CELL_CODES),
+        # four cells per byte with the lowest flat index in the low bits
+        n = self.size
+        packed = bytearray(1 + (n * n + 3) // 4)
+        packed[0] = n
+        for idx, v in enumerate(self._cells):
+            if v:
+                packed[1 + (idx >> 2)] |= v << ((idx & 3) << 1)
+        return bytes(packed)
+
+    @classmethod
+    def from_bytes(cls, data, expected_size=None):
+        # Rebuild a board from to_bytes output; raises ValueError if malformed
+        # or, when expected_size is given, of another size. Everything is
+        # checked before the board (and its per-size tables) is built
+        if not data:
+            raise ValueError("packed board is empty")
+        n = data[0]
+        if expected_size is not None and n != expected_size:
+            raise ValueError(f"packed board must be {expected_size}x{expected_size}")
+        if n == 0 or len(data) != 1 + (n * n + 3) // 4:
+            raise ValueError("packed board has wrong length")
+        tail = (n * n) & 3
+        if tail and data[-1] >> (tail << 1):
+            raise ValueError("packed board has non-zero padding bits")
+
+        b = cls(n)
+        for idx in range(n * n):
+            v = (data[1 + (idx >> 2)] >> ((idx & 3) << 1)) & 3
+            if v == 0:
+                continue
+            if v not in CODE_STONES:
+                raise ValueError("invalid packed cell value")
+            b.place(b._coords[idx], CODE_STONES[v])
+        b.last_move = None
+        return b
+
+    def to_base64(self):
+        # Return to_bytes as unpadded URL-safe base64 text
+        return base64.urlsafe_b64encode(self.to_bytes()).rstrip(b"=").decode("ascii")
+
+    @classmethod
+    def from_base64(cls, text, expected_size=None):
+        # Rebuild a board from to_base64 output; raises ValueError if malformed
+        # or not expected_size (see from_bytes)
+        try:
+            data = base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
+        except (TypeError, ValueError) as e:
+            raise ValueError("invalid base64 board") from e
+        return cls.from_bytes(data, expected_size)
+
     def copy(self):
         # Return a deep copy of the board
         b = Board(self.size)
         b._grid = [row[:] for row in self._grid]
+        b._cells[:] = self._cells
         b.last_move = self.last_move
+        b._winner = self._winner
+        b._history = self._history[:]
+        b._hash = self._hash
+        b._occupied = self._occupied
+        b._near = {rad: near[:] for rad, near in self._near.items()}
+        b._zone = dict(self._zone)
+        b._trackers = {key: t.copy() for key, t in self._trackers.items()}
+        b._version = self._version
+        b._snapshot = self._snapshot
+        b._snapshot_version = self._snapshot_version
         return b
 
     def __str__(self):
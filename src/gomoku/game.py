@@ -23,11 +23,12 @@ class Game:
 
     def winner(self):
         # Return the winning stone if any
-        return rules.winner(self.board.grid)
+        result = rules.status(self.board)
+        return result if result in (BLACK, WHITE) else None
 
     def is_over(self):
         # Return True if the game has ended
-        return rules.is_terminal(self.board.grid)
+        return rules.status(self.board) != rules.ONGOING
 
     def agent_for_turn(self):
         # Return the agent responsible for current turn
@@ -0,0 +1,56 @@
+from gomoku.board import WIN_LENGTH
+
+_TABLES = {}
+
+
+class LineTables:
+    # Flat-index tables for every row, column and diagonal of one board size.
+    # lines[i] lists the cells of line i from one end to the other;
+    # through[idx] lists (line id, position) for each line crossing cell idx;
+    # win_lines holds ids of lines long enough to contain win_length in a row.
+
+    def __init__(self, size, win_length=WIN_LENGTH):
+        # Build line tables once per (size, win_length)
+        self.size = size
+        self.win_length = win_length
+        self.lines = []
+
+        # rows
+        for r in range(size):
+            self.lines.append(tuple(r * size + c for c in range(size)))
+
+        # columns
+        for c in range(size):
+            self.lines.append(tuple(r * size + c for r in range(size)))
+
+        # '/' diagonals (r + c constant)
+        for d in range(2 * size - 1):
+            line = tuple(r * size + (d - r) for r in range(size) if 0 <= d - r < size)
+            if len(line) >= 2:
+                self.lines.append(line)
+
+        # '\' diagonals (r - c constant)
+        for d in range(-size + 1, size):
+            line = tuple(r * size + (r - d) for r in range(size) if 0 <= r - d < size)
+            if len(line) >= 2:
+                self.lines.append(line)
+
+        self.through = [[] for _ in range(size * size)]
+        for line_id, line in enumerate(self.lines):
+            for pos, idx in enumerate(line):
+                self.through[idx].append((line_id, pos))
+
+        self.win_lines = [
+            line_id for line_id, line in enumerate(self.lines)
+            if len(line) >= win_length
+        ]
+
+
+def line_tables(size, win_length=WIN_LENGTH):
+    # Return the cached LineTables for this board size and win length
+    key = (size, win_length)
+    tables = _TABLES.get(key)
+    if tables is None:
+        tables = LineTables(size, win_length)
+        _TABLES[key] = tables
+    return tables
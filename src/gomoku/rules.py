@@ -1,65 +1,117 @@
-from gomoku.board import BLACK, WHITE, EMPTY, WIN_LENGTH
+from gomoku.board import Board, BLACK, WHITE, EMPTY, WIN_LENGTH, CELL_CODES
+from gomoku.lines import line_tables
+
+# status() results other than a winning stone
+DRAW = "draw"
+ONGOING = "ongoing"
 
 
 def winner(grid):
     # Return BLACK or WHITE if a winning sequence exists
+    # A Board tracks its winner on place, so only raw grids are scanned
+    if isinstance(grid, Board):
+        return grid.winner
+
     target_white = WHITE * WIN_LENGTH
     target_black = BLACK * WIN_LENGTH
-    n = len(grid)
 
-    def check_line(line):
-        # Check if a line contains a winning sequence
-        s = "".join(line)
+    flat = [v for row in grid for v in row]
+    tables = line_tables(len(grid))
+
+    # Rows, columns, then '/' and '\' diagonals
+    for line_id in tables.win_lines:
+        s = "".join([flat[i] for i in tables.lines[line_id]])
         if target_white in s:
             return WHITE
         if target_black in s:
             return BLACK
-        return None
-
-    # Check rows
-    for row in grid:
-        w = check_line(row)
-        if w:
-            return w
-
-    # Check columns
-    for col in zip(*grid):
-        w = check_line(col)
-        if w:
-            return w
-
-    # Check '/' diagonals
-    diags = [[] for _ in range(2 * n - 1)]
-    for r in range(n):
-        for c in range(n):
-            diags[r + c].append(grid[r][c])
-    for d in diags:
-        w = check_line(d)
-        if w:
-            return w
-
-    # Check '\' diagonals
-    diags = [[] for _ in range(2 * n - 1)]
-    offset = n - 1
-    for r in range(n):
-        for c in range(n):
-            diags[r - c + offset].append(grid[r][c])
-    for d in diags:
-        w = check_line(d)
-        if w:
-            return w
 
     return None
 
 
-def is_draw(grid):
-    # Return True if board is full and no winner exists
+def winner_batch(boards):
+    # Return winners for many boards at once, matching winner() per board
+    # boards: (N, size, size) int8 array of CELL_CODES, or a sequence of Boards
+    # Requires numpy; gathers every line through the shared line tables and
+    # finds WIN_LENGTH runs with sliding-window sums along each line
+    import numpy as np
+
+    if not isinstance(boards, np.ndarray):
+        boards = list(boards)
+        if not boards:
+            return []
+        boards = np.stack([
+            np.frombuffer(b.cells, dtype=np.int8).reshape(b.size, b.size)
+            for b in boards
+        ])
+
+    n_boards, n, _ = boards.shape
+    if n_boards == 0:
+        return []
+
+    tables = line_tables(n)
+    win_lines = [tables.lines[i] for i in tables.win_lines]
+    if not win_lines:
+        return [None] * n_boards
+
+    # Pad short lines with an extra always-empty cell at flat index n * n
+    max_len = max(len(line) for line in win_lines)
+    index = np.full((len(win_lines), max_len), n * n, dtype=np.intp)
+    for i, line in enumerate(win_lines):
+        index[i, :len(line)] = line
+
+    flat = np.zeros((n_boards, n * n + 1), dtype=np.int8)
+    flat[:, :n * n] = boards.reshape(n_boards, n * n)
+    cells = flat[:, index]
+
+    span = max_len - WIN_LENGTH + 1
+
+    def first_five_line(code):
+        # Index of the first line holding a five for code, or len(lines)
+        hits = (cells == code).view(np.int8)
+        window = hits[:, :, :span]
+        for k in range(1, WIN_LENGTH):
+            window = window + hits[:, :, k:k + span]
+        five = (window == WIN_LENGTH).any(axis=2)
+        return np.where(five.any(axis=1), five.argmax(axis=1), len(win_lines))
+
+    # Same priority as winner(): first line in table order, white before black
+    white_at = first_five_line(CELL_CODES[WHITE])
+    black_at = first_five_line(CELL_CODES[BLACK])
+
+    result = []
+    for w, b in zip(white_at.tolist(), black_at.tolist()):
+        if w < len(win_lines) and w <= b:
+            result.append(WHITE)
+        elif b < len(win_lines):
+            result.append(BLACK)
+        else:
+            result.append(None)
+    return result
+
+
+def status(grid):
+    # Return BLACK/WHITE for a win, DRAW for a full board, else ONGOING
+    # Boards answer from their cached winner and empty-cell count
+    if isinstance(grid, Board):
+        if grid.winner is not None:
+            return grid.winner
+        return DRAW if grid.empty_count == 0 else ONGOING
+
+    w = winner(grid)
+    if w is not None:
+        return w
     for row in grid:
         if EMPTY in row:
-            return False
-    return winner(grid) is None
+            return ONGOING
+    return DRAW
+
+
+def is_draw(grid):
+    # Return True if board is full and no winner exists
+    return status(grid) == DRAW
 
 
 def is_terminal(grid):
     # Return True if game is over (win or draw)
-    return winner(grid) is not None or is_draw(grid)
+    return status(grid) != ONGOING
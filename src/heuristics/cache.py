@@ -0,0 +1,95 @@
+import sys
+from array import array
+from collections import OrderedDict
+from heuristics.features import FEATURE_NAMES, feature_accumulator
+
+# default memory cap for one cache
+DEFAULT_CACHE_BYTES = 32 * 1024 * 1024
+
+
+def _entry_bytes():
+    # rough retained size of one entry: key tuple, entry list, packed
+    # feature values, score float and the OrderedDict link
+    values = array("d", bytes(8 * len(FEATURE_NAMES)))
+    key = (1 << 63, "X")
+    entry = [values, 0, None, 0.0]
+    return (
+        sys.getsizeof(key)
+        + sys.getsizeof(key[0])
+        + sys.getsizeof(entry)
+        + sys.getsizeof(values)
+        + sys.getsizeof(0.5)
+        + 100
+    )
+
+
+ENTRY_BYTES = _entry_bytes()
+
+
+class FeatureCache:
+    # bounded LRU of feature vectors and evaluations, keyed by
+    # (position hash, perspective); entries also store the stone count to
+    # reject hash collisions, and the weights their score was computed with
+
+    def __init__(self, max_bytes=DEFAULT_CACHE_BYTES):
+        # memory cap is converted to an entry count up front
+        self.max_bytes = int(max_bytes)
+        self.max_entries = max(1, self.max_bytes // ENTRY_BYTES)
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def clear(self):
+        # drop all entries and reset counters
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self):
+        # counters for benchmarks and tuning
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+        }
+
+    def _entry(self, board, stone):
+        # find or create the entry for board from stone's perspective
+        key = (board.hash, stone)
+        entries = self._entries
+        entry = entries.get(key)
+        if entry is not None and entry[1] == board.stone_count:
+            entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+        self.misses += 1
+        values = array("d", feature_accumulator(board).values(stone))
+        entry = [values, board.stone_count, None, 0.0]
+        entries[key] = entry
+        entries.move_to_end(key)
+        if len(entries) > self.max_entries:
+            entries.popitem(last=False)
+        return entry
+
+    def values(self, board, stone):
+        # feature values in FEATURE_NAMES order
+        return self._entry(board, stone)[0]
+
+    def features(self, board, stone):
+        # feature dict, as returned by extract_features
+        return dict(zip(FEATURE_NAMES, self._entry(board, stone)[0]))
+
+    def score(self, board, stone, weights, compute):
+        # cached evaluation under weights; compute(values) fills a miss
+        entry = self._entry(board, stone)
+        if entry[2] is not weights:
+            entry[3] = compute(entry[0])
+            entry[2] = weights
+        return entry[3]
@@ -1,6 +1,17 @@
 import json
+from operator import mul
 from gomoku import rules
-from heuristics.features import extract_features
+from gomoku.board import neighbour_table
+from gomoku.lines import line_tables
+from heuristics.features import (
+    FEATURE_INDEX,
+    FEATURE_NAMES,
+    WINDOW_CELLS,
+    feature_accumulator,
+    threat_flags,
+    threat_level,
+    threat_level_from_total,
+)
 
 
 BASE_PATTERN_WEIGHTS = {
@@ -66,79 +77,74 @@ def _build_mirror_weights(base):
 DEFAULT_WEIGHTS = _build_mirror_weights(BASE_PATTERN_WEIGHTS)
 
 
-def evaluate(board, stone, weights=None):
+class CompiledWeights:
+    # weight dict merged over DEFAULT_WEIGHTS and flattened into
+    # FEATURE_NAMES order, so evaluation is a dot product with the
+    # feature vector; keys outside the schema (e.g. "bias") are ignored
+
+    def __init__(self, weights=None):
+        # build the merged dict and the weight vector once
+        w = dict(DEFAULT_WEIGHTS)
+        if weights:
+            w.update(weights)
+        self.weights = w
+        self.vector = tuple(float(w.get(k, 0.0)) for k in FEATURE_NAMES)
+
+    def dot(self, values):
+        # weighted sum of a feature vector in FEATURE_NAMES order
+        return float(sum(map(mul, self.vector, values)))
+
+
+_DEFAULT_COMPILED = CompiledWeights()
+
+
+def compile_weights(weights=None):
+    # return CompiledWeights for a weight dict; compiled weights pass through
+    if isinstance(weights, CompiledWeights):
+        return weights
+    if not weights:
+        return _DEFAULT_COMPILED
+    return CompiledWeights(weights)
+
+
+def evaluate(board, stone, weights=None, cache=None):
     # evaluate board: terminal check + weighted features
-    w = dict(DEFAULT_WEIGHTS)
-    if weights:
-        w.update(weights)
+    # cache: optional FeatureCache shared across calls
+    w = compile_weights(weights)
 
     opp = _other(stone)
 
-    winner = rules.winner(board.grid)
+    winner = rules.winner(board)
     if winner == stone:
         return WIN_SCORE
     if winner == opp:
         return LOSS_SCORE
 
-    feats = extract_features(board, stone)
-    return float(sum(float(w.get(k, 0.0)) * float(v) for k, v in feats.items()))
+    if cache is not None:
+        return cache.score(board, stone, w, w.dot)
+    return w.dot(feature_accumulator(board).values(stone))
+
+
+def _winner_after(board, move, stone):
+    # winner after stone plays the empty cell move, without placing it
+    winner = board.winner
+    if winner is None and board.would_win(move, stone):
+        return stone
+    return winner
 
 
 def _is_immediate_win(board, move, stone):
     # check if move wins immediately
-    b = board.copy()
-    if not b.place(move, stone):
+    if not board.is_empty(move):
         return False
-    return rules.winner(b.grid) == stone
+    return _winner_after(board, move, stone) == stone
 
 
 def _is_immediate_block(board, move, opp):
     # check if move blocks opponent win
-    b = board.copy()
-    if not b.place(move, opp):
+    if not board.is_empty(move):
         return False
-    return rules.winner(b.grid) == opp
-
-
-def _simulate_move(board, move, stone):
-    # simulate move without modifying original board
-    b = board.copy()
-    if not b.place(move, stone):
-        return None
-    return b
-
-
-def _level_from_feats(feats, prefix):
-    # map features to coarse threat level
-    if feats.get(f"{prefix}_live_four", 0.0) > 0.0:
-        return 6
-    if feats.get(f"{prefix}_double_blocked_four", 0.0) > 0.0:
-        return 5
-    if feats.get(f"{prefix}_blocked4_and_live3", 0.0) > 0.0:
-        return 5
-    if feats.get(f"{prefix}_blocked4_and_jump4", 0.0) > 0.0:
-        return 5
-    if feats.get(f"{prefix}_double_jump_four", 0.0) > 0.0:
-        return 5
-    if feats.get(f"{prefix}_jump_four", 0.0) > 0.0:
-        return 4
-    if feats.get(f"{prefix}_blocked_four", 0.0) > 0.0:
-        return 4
-    if feats.get(f"{prefix}_double_live_three", 0.0) > 0.0:
-        return 3
-    if feats.get(f"{prefix}_jump3_and_live3", 0.0) > 0.0:
-        return 3
-    if feats.get(f"{prefix}_double_jump_three", 0.0) > 0.0:
-        return 3
-    if feats.get(f"{prefix}_live_three", 0.0) > 0.0:
-        return 2
-    if feats.get(f"{prefix}_jump_three", 0.0) > 0.0:
-        return 2
-    if feats.get(f"{prefix}_live_two", 0.0) > 0.0:
-        return 1
-    if feats.get(f"{prefix}_jump_two", 0.0) > 0.0:
-        return 1
-    return 0
+    return _winner_after(board, move, opp) == opp
 
 
 # features used for attack delta
@@ -162,14 +168,8 @@ _ATTACK_DELTA_KEYS = [
     "my_jump4_and_live3",
     "my_jump4_and_jump3",
 ]
-
-
-def _feature_deltas(before_feats, after_feats):
-    # compute feature changes after move
-    return {
-        k: after_feats.get(k, 0.0) - before_feats.get(k, 0.0)
-        for k in _ATTACK_DELTA_KEYS
-    }
+# (key, FEATURE_NAMES position) pairs for attack deltas
+_ATTACK_DELTA_INDEX = tuple((k, FEATURE_INDEX[k]) for k in _ATTACK_DELTA_KEYS)
 
 
 def _attack_tier_from_deltas(d):
@@ -227,84 +227,126 @@ def _attack_subscore_from_deltas(d):
     )
 
 
-def _build_opp_after_cache(board, stone, cand2):
-    # cache opponent one-move simulations (board state + extracted features) for reuse
+def _opp_threat_index(board, stone, cand2):
+    # threat flags for each opponent reply in cand2, read from the board's
+    # per-line threat index instead of simulating the move
     opp = _other(stone)
-    cache = {}
+    acc = feature_accumulator(board)
+    n = board.size
+    flags = {}
 
     for m in cand2:
-        b = board.copy()
-        if not b.place(m, opp):
+        if not board.is_empty(m):
             continue
-        cache[m] = (b, extract_features(b, opp))
+        r, c = m
+        flags[m] = threat_flags(acc.total_after(r * n + c, opp), opp)
 
-    return cache
+    return flags
 
-def _opp_threat_points(opp_after):
-    # collect opponent moves that create three-level and four-level threats
-    three_pts = set()
-    four_pts = set()
-
-    for m, (_, feats) in opp_after.items():
-        if (
-            feats.get("my_live_four", 0.0) > 0.0
-            or feats.get("my_double_blocked_four", 0.0) > 0.0
-            or feats.get("my_blocked4_and_jump4", 0.0) > 0.0
-            or feats.get("my_double_jump_four", 0.0) > 0.0
-            or feats.get("my_blocked4_and_live3", 0.0) > 0.0
-            or feats.get("my_blocked4_and_jump3", 0.0) > 0.0
-            or feats.get("my_jump4_and_live3", 0.0) > 0.0
-            or feats.get("my_jump4_and_jump3", 0.0) > 0.0
-        ):
-            four_pts.add(m)
-
-        if (
-            feats.get("my_double_live_three", 0.0) > 0.0
-            or feats.get("my_jump3_and_live3", 0.0) > 0.0
-            or feats.get("my_double_jump_three", 0.0) > 0.0
-        ):
-            three_pts.add(m)
 
+def _opp_threat_points(opp_flags):
+    # collect opponent moves that create three-level and four-level threats
+    three_pts = {m for m, (_, double_three, _) in opp_flags.items() if double_three}
+    four_pts = {m for m, (_, _, four) in opp_flags.items() if four}
     return three_pts, four_pts
 
 
-def _opp_next_three_to_threat_points(stone, opp_after):
-    # classify opponent one-step simulations into three-threat and four-threat points
+def _opp_next_three_to_threat_points(board, stone, opp_flags, only=None):
+    # opponent moves making a three from which one more move makes a
+    # four-level or double-three threat; the follow-up candidates are the
+    # radius-2 frontier after the first move, read from the threat index
+    # only: if given, just the first moves in this set are classified
     opp = _other(stone)
+    acc = feature_accumulator(board)
+    n = board.size
+    cells = board.cells
+    ring = neighbour_table(n, 2)
+    tables = line_tables(n)
+    reach = WINDOW_CELLS - 1
+
+    base = acc.total
+    step = {}
+    frontier = {r * n + c for r, c in opp_flags}
     pts = set()
 
-    for m1, (b1, feats1) in opp_after.items():
-        if (
-            feats1.get("my_live_three", 0.0) <= 0.0
-            and feats1.get("my_jump_three", 0.0) <= 0.0
-        ):
+    for m1, (three, _, _) in opp_flags.items():
+        if not three or (only is not None and m1 not in only):
             continue
 
-        for m2 in b1.candidate_moves(radius=2):
-            b2 = b1.copy()
-            if not b2.place(m2, opp):
-                continue
-
-            feats2 = extract_features(b2, opp)
-            if (
-                feats2.get("my_live_four", 0.0) > 0.0
-                or feats2.get("my_double_blocked_four", 0.0) > 0.0
-                or feats2.get("my_blocked4_and_jump4", 0.0) > 0.0
-                or feats2.get("my_double_jump_four", 0.0) > 0.0
-                or feats2.get("my_blocked4_and_live3", 0.0) > 0.0
-                or feats2.get("my_blocked4_and_jump3", 0.0) > 0.0
-                or feats2.get("my_jump4_and_live3", 0.0) > 0.0
-                or feats2.get("my_jump4_and_jump3", 0.0) > 0.0
-                or feats2.get("my_double_live_three", 0.0) > 0.0
-                or feats2.get("my_jump3_and_live3", 0.0) > 0.0
-                or feats2.get("my_double_jump_three", 0.0) > 0.0
-            ):
+        first = m1[0] * n + m1[1]
+        after_first = acc.total_after(first, opp)
+
+        # cells sharing a pattern window with the first move need a re-count;
+        # every other follow-up just adds its own delta
+        shared = set()
+        for line_id, pos in tables.through[first]:
+            shared.update(tables.lines[line_id][max(0, pos - reach):pos + reach + 1])
+
+        follow_ups = frontier.union(j for j in ring[first] if cells[j] == 0)
+        follow_ups.discard(first)
+        for second in follow_ups:
+            if second in shared:
+                total = acc.total_after_pair(first, second, opp)
+            else:
+                d = step.get(second)
+                if d is None:
+                    d = step[second] = acc.total_after(second, opp) - base
+                total = after_first + d
+            _, double_three, four = threat_flags(total, opp)
+            if four or double_three:
                 pts.add(m1)
                 break
 
     return pts
 
 
+def score_move_deltas(board, stone, moves, weights=None, cache=None):
+    # score each empty candidate from the four lines through it, without
+    # placing stones: feature deltas, attack tier and subscore, eval delta,
+    # centre distance and the drop in the opponent's threat level
+    w = compile_weights(weights)
+    acc = feature_accumulator(board)
+    n = board.size
+    center = (n // 2, n // 2)
+
+    opp = _other(stone)
+
+    before_eval = evaluate(board, stone, weights=w, cache=cache)
+    before_values = acc.values(stone)
+    before_opp_level = threat_level(board, opp)
+
+    items = []
+    for move in moves:
+        if not board.is_empty(move):
+            continue
+        r, c = move
+
+        idx = r * n + c
+        total = acc.total_after(idx, stone)
+        after_values = acc.values_after(idx, stone, stone, total)
+
+        winner = _winner_after(board, move, stone)
+        if winner is None:
+            after_eval = w.dot(after_values)
+        else:
+            after_eval = WIN_SCORE if winner == stone else LOSS_SCORE
+
+        d = {k: after_values[i] - before_values[i] for k, i in _ATTACK_DELTA_INDEX}
+        items.append(
+            {
+                "move": move,
+                "deltas": d,
+                "tier": _attack_tier_from_deltas(d),
+                "subscore": _attack_subscore_from_deltas(d),
+                "delta": after_eval - before_eval,
+                "dist": abs(r - center[0]) + abs(c - center[1]),
+                "threat_drop": before_opp_level - threat_level_from_total(total, opp),
+            }
+        )
+
+    return items
+
+
 def _score_sort_key(item):
     # attack-first ordering
     move = item["move"]
@@ -334,31 +376,47 @@ def _defense_sort_key(item):
     )
 
 
-def order_moves(board, moves, stone, weights=None):
+def order_moves(board, moves, stone, weights=None, cache=None):
     # ordering: # win > block > (defense if required) > attack
     # attack: tier -> cover/block three threats -> subscore -> eval delta -> center
     # defense: cover four threats -> threat drop -> attack value
     # defense mode triggers when no attack and opponent has threats
-    if not moves:
-        return []
+    return list(order_moves_lazy(board, moves, stone, weights, cache))
 
-    w = dict(DEFAULT_WEIGHTS)
-    if weights:
-        w.update(weights)
+
+def order_moves_lazy(board, moves, stone, weights=None, cache=None):
+    # generator yielding exactly order_moves' sequence, one stage at a time:
+    # immediate wins, forced blocks, forced defense, then attack tiers from
+    # the highest down; each stage is computed only when the caller asks
+    # past the previous one, so an early cutoff skips the rest
+    # the board may be pushed/popped between yields but must be restored
+    if not moves:
+        return
 
     opp = _other(stone)
-    center = (board.size // 2, board.size // 2)
 
-    before_eval = evaluate(board, stone, weights=w)
-    before_feats = extract_features(board, stone)
+    # stage 1: immediate wins, found with local five checks
+    blocking_moves = []
+    rest = []
+    for move in moves:
+        if _is_immediate_win(board, move, stone):
+            yield move
+        elif _is_immediate_block(board, move, opp):
+            blocking_moves.append(move)
+        else:
+            rest.append(move)
 
-    opp_level = _level_from_feats(before_feats, "opp")
-    my_level = _level_from_feats(before_feats, "my")
+    # stage 2: forced blocks
+    yield from blocking_moves
+
+    # stage 3: score the rest and find the opponent's threat points
+    w = compile_weights(weights)
+    opp_level = threat_level(board, opp)
+    my_level = threat_level(board, stone)
 
     cand2 = list(board.candidate_moves(radius=2))
-    opp_after = _build_opp_after_cache(board, stone, cand2)
-    opp_three_threat_points, opp_four_threat_points = _opp_threat_points(opp_after)
-    opp_three_to_threat_points = _opp_next_three_to_threat_points(stone, opp_after)
+    opp_flags = _opp_threat_index(board, stone, cand2)
+    opp_three_threat_points, opp_four_threat_points = _opp_threat_points(opp_flags)
 
     # defend only if we have no real attack and opponent has pressure
     must_defend = (
@@ -366,83 +424,39 @@ def order_moves(board, moves, stone, weights=None):
         and (opp_level >= 2 or bool(opp_four_threat_points))
     )
 
-    winning_moves = []
-    blocking_moves = []
-    scored_moves = []
-
-    for move in moves:
-        if _is_immediate_win(board, move, stone):
-            winning_moves.append(move)
-            continue
-
-        if _is_immediate_block(board, move, opp):
-            blocking_moves.append(move)
-            continue
-
-        next_board = _simulate_move(board, move, stone)
-        if next_board is None:
-            continue
-
-        after_feats = extract_features(next_board, stone)
-        after_eval = evaluate(next_board, stone, weights=w)
-
-        d = _feature_deltas(before_feats, after_feats)
-        r, c = move
-
-        scored_moves.append(
-            {
-                "move": move,
-                "next_board": next_board,
-                "after_feats": after_feats,
-                "tier": _attack_tier_from_deltas(d),
-                "subscore": _attack_subscore_from_deltas(d),
-                "delta": after_eval - before_eval,
-                "dist": abs(r - center[0]) + abs(c - center[1]),
-                "covers_four_threat_point": move in opp_four_threat_points,
-                "covers_three_threat_point": move in opp_three_threat_points,
-                "blocks_three_to_threat": move in opp_three_to_threat_points,
-            }
-        )
-
-    scored_moves.sort(key=_score_sort_key)
-
-    if not must_defend:
-        return winning_moves + blocking_moves + [x["move"] for x in scored_moves]
-
-    before_opp_level = _level_from_feats(before_feats, "opp")
-    forced_defense_moves = []
-
+    scored_moves = score_move_deltas(board, stone, rest, weights=w, cache=cache)
     for item in scored_moves:
-        after_opp_level = _level_from_feats(extract_features(item["next_board"], opp), "my")
-        threat_drop = before_opp_level - after_opp_level
+        move = item["move"]
+        item["covers_four_threat_point"] = move in opp_four_threat_points
+        item["covers_three_threat_point"] = move in opp_three_threat_points
 
+    forced_set = set()
+    if must_defend:
         # keep only moves that actually reduce opponent threat level
-        if item["covers_four_threat_point"] or threat_drop > 0:
-            forced_defense_moves.append(
-                {
-                    "move": item["move"],
-                    "threat_drop": threat_drop,
-                    "tier": item["tier"],
-                    "subscore": item["subscore"],
-                    "delta": item["delta"],
-                    "dist": item["dist"],
-                }
-            )
-
-    forced_defense_moves.sort(key=_defense_sort_key)
-
-    if not forced_defense_moves:
-        return winning_moves + blocking_moves + [x["move"] for x in scored_moves]
-
-    forced_set = {x["move"] for x in forced_defense_moves}
-    remaining = [x["move"] for x in scored_moves if x["move"] not in forced_set]
+        forced_defense_moves = [
+            item for item in scored_moves
+            if item["covers_four_threat_point"] or item["threat_drop"] > 0
+        ]
+        forced_defense_moves.sort(key=_defense_sort_key)
+        forced_set = {x["move"] for x in forced_defense_moves}
+        yield from (x["move"] for x in forced_defense_moves)
+
+    # stage 4: attack ordering, one tier bucket at a time; the two-ply
+    # three-to-threat scan runs only for the bucket being yielded
+    buckets = {}
+    for item in scored_moves:
+        if item["move"] not in forced_set:
+            buckets.setdefault(item["tier"], []).append(item)
 
-    return (
-        winning_moves
-        + blocking_moves
-        + [x["move"] for x in forced_defense_moves]
-        + remaining
-    )
+    for tier in sorted(buckets, reverse=True):
+        bucket = buckets[tier]
+        to_threat = _opp_next_three_to_threat_points(
+            board, stone, opp_flags, only={x["move"] for x in bucket}
+        )
+        for item in bucket:
+            item["blocks_three_to_threat"] = item["move"] in to_threat
+        bucket.sort(key=_score_sort_key)
+        yield from (x["move"] for x in bucket)
 
 
 def load_weights_json(path):
@@ -1,4 +1,6 @@
-from gomoku.board import BLACK, WHITE, EMPTY
+from array import array
+from gomoku.board import BLACK, WHITE, EMPTY, CELL_CODES, WIN_LENGTH
+from gomoku.lines import line_tables
 
 
 def _other(stone):
@@ -6,320 +8,732 @@ def _other(stone):
     return WHITE if stone == BLACK else BLACK
 
 
-def _iter_lines(grid):
-    # iterate all rows, columns, and diagonals
-    n = len(grid)
-
-    # rows
-    for r in range(n):
-        yield list(grid[r])
-
-    # columns
-    for c in range(n):
-        yield [grid[r][c] for r in range(n)]
-
-    # "\" diagonals
-    for d in range(-n + 1, n):
-        line = []
-        for r in range(n):
-            c = r - d
-            if 0 <= c < n:
-                line.append(grid[r][c])
-        if len(line) >= 2:
-            yield line
-
-    # "/" diagonals
-    for d in range(2 * n - 1):
-        line = []
-        for r in range(n):
-            c = d - r
-            if 0 <= c < n:
-                line.append(grid[r][c])
-        if len(line) >= 2:
-            yield line
-
-
-def _count_line_patterns(line, stone):
-    # count patterns in a single line
-    n = len(line)
-
-    live_two = 0
-    blocked_two = 0
-    live_three = 0
-    blocked_three = 0
-    live_four = 0
-    blocked_four = 0
-    jump_two = 0
-    blocked_jump_two = 0
-    jump_three = 0
-    blocked_jump_three = 0
-    jump_four = 0
-    blocked_jump_four = 0
-
-    i = 0
-    while i < n:
-        if line[i] != stone:
-            i += 1
-            continue
+# pattern counts reported per side, in feature order
+PATTERN_NAMES = (
+    "live_two",
+    "blocked_two",
+    "live_three",
+    "blocked_three",
+    "live_four",
+    "blocked_four",
+    "jump_two",
+    "blocked_jump_two",
+    "jump_three",
+    "blocked_jump_three",
+    "jump_four",
+    "blocked_jump_four",
+)
+
+# combo features derived per side from pattern totals, in feature order
+COMBO_NAMES = (
+    "double_live_three",
+    "double_jump_three",
+    "jump3_and_live3",
+    "double_blocked_four",
+    "blocked4_and_jump4",
+    "blocked4_and_live3",
+    "blocked4_and_jump3",
+    "double_jump_four",
+    "jump4_and_live3",
+    "jump4_and_jump3",
+)
+
+_MY_PATTERN_KEYS = tuple(f"my_{name}" for name in PATTERN_NAMES)
+_OPP_PATTERN_KEYS = tuple(f"opp_{name}" for name in PATTERN_NAMES)
+_MY_COMBO_KEYS = tuple(f"my_{name}" for name in COMBO_NAMES)
+_OPP_COMBO_KEYS = tuple(f"opp_{name}" for name in COMBO_NAMES)
+
+# stable feature schema: vector position i holds FEATURE_NAMES[i]
+FEATURE_NAMES = (
+    ("my_stones", "opp_stones", "empty")
+    + _MY_PATTERN_KEYS
+    + _OPP_PATTERN_KEYS
+    + _MY_COMBO_KEYS
+    + _OPP_COMBO_KEYS
+)
+FEATURE_INDEX = {name: i for i, name in enumerate(FEATURE_NAMES)}
+
+# consecutive runs: maximal run of own stones, open ends are empty cells
+RUN_PATTERNS = {
+    2: ("live_two", "blocked_two"),
+    3: ("live_three", "blocked_three"),
+    4: ("live_four", "blocked_four"),
+}
+
+# jump patterns: x = own stone, _ = empty
+JUMP_PATTERNS = {
+    "jump_two": ("_x_x_",),
+    "blocked_jump_two": ("x_x_", "_x_x"),
+    "jump_three": ("_xx_x_", "_x_xx_"),
+    "blocked_jump_three": ("xx_x_", "x_xx_", "_xx_x", "_x_xx"),
+    "jump_four": ("_xxx_x_", "_xx_xx_", "_x_xxx_"),
+    "blocked_jump_four": ("xxx_x_", "xx_xx_", "x_xxx_", "_xxx_x", "_xx_xx", "_x_xxx"),
+}
+
+# line cell codes: CELL_CODES for board cells, plus a wall past either end
+_WALL = 3
+_STONE_CODES = (CELL_CODES[BLACK], CELL_CODES[WHITE])
+
+# every pattern fits in a 7-cell window anchored at its first cell
+# (runs anchor on the cell before the run)
+_WINDOW = 7
+WINDOW_CELLS = _WINDOW
+_WINDOW_MASK = (1 << (2 * _WINDOW)) - 1
+_WALL_TAIL = (1 << (2 * _WINDOW)) - 1
+
+# pattern counts for both colours packed into one int, 12 bits per field:
+# field index = colour index * len(PATTERN_NAMES) + pattern index
+_FIELD_BITS = 12
+_FIELD_MASK = (1 << _FIELD_BITS) - 1
+
+
+def _field_shift(colour_index, name):
+    # bit offset of a packed pattern count
+    return (colour_index * len(PATTERN_NAMES) + PATTERN_NAMES.index(name)) * _FIELD_BITS
+
+
+# per-colour field offsets in PATTERN_NAMES order, and the pattern
+# positions the combo features read
+_SIDE_SHIFTS = {
+    stone: tuple(_field_shift(ci, name) for name in PATTERN_NAMES)
+    for ci, stone in enumerate((BLACK, WHITE))
+}
+_LIVE_TWO = PATTERN_NAMES.index("live_two")
+_JUMP_TWO = PATTERN_NAMES.index("jump_two")
+_LIVE_THREE = PATTERN_NAMES.index("live_three")
+_LIVE_FOUR = PATTERN_NAMES.index("live_four")
+_BLOCKED_FOUR = PATTERN_NAMES.index("blocked_four")
+_JUMP_THREE = PATTERN_NAMES.index("jump_three")
+_JUMP_FOUR = PATTERN_NAMES.index("jump_four")
+
+# patterns whose count rising means a move made a four or a three threat
+_FOUR_PATTERNS = (
+    _LIVE_FOUR,
+    _BLOCKED_FOUR,
+    _JUMP_FOUR,
+    PATTERN_NAMES.index("blocked_jump_four"),
+)
+_THREE_PATTERNS = (_LIVE_THREE, _JUMP_THREE)
+
+
+def _window_codes(cells):
+    # all window codes whose leading cells are drawn from the given code sets
+    free = (0, 1, 2, _WALL)
+    codes = [0]
+    for pos in range(_WINDOW):
+        allowed = cells[pos] if pos < len(cells) else free
+        codes = [code | (v << (2 * pos)) for code in codes for v in allowed]
+    return codes
+
+
+def _build_window_lut():
+    # packed pattern counts anchored at the first cell of every 7-cell window
+    lut = [0] * (1 << (2 * _WINDOW))
+
+    for ci, own in enumerate(_STONE_CODES):
+        opp = _STONE_CODES[1 - ci]
+
+        for run_len, (live, blocked) in RUN_PATTERNS.items():
+            for left in (0, opp, _WALL):
+                for right in (0, opp, _WALL):
+                    open_ends = (left == 0) + (right == 0)
+                    if open_ends == 0:
+                        continue
+                    name = live if open_ends == 2 else blocked
+                    cells = [(left,)] + [(own,)] * run_len + [(right,)]
+                    for code in _window_codes(cells):
+                        lut[code] += 1 << _field_shift(ci, name)
+
+        for name, patterns in JUMP_PATTERNS.items():
+            for pattern in patterns:
+                cells = [(own,) if ch == "x" else (0,) for ch in pattern]
+                for code in _window_codes(cells):
+                    lut[code] += 1 << _field_shift(ci, name)
+
+    return lut
+
+
+_WINDOW_LUT = _build_window_lut()
 
-        j = i
-        while j < n and line[j] == stone:
-            j += 1
-
-        run_len = j - i
-
-        # check openness of ends
-        left_open = (i - 1 >= 0 and line[i - 1] == EMPTY)
-        right_open = (j < n and line[j] == EMPTY)
-
-        if run_len == 2:
-            if left_open and right_open:
-                live_two += 1
-            elif left_open or right_open:
-                blocked_two += 1
-
-        elif run_len == 3:
-            if left_open and right_open:
-                live_three += 1
-            elif left_open or right_open:
-                blocked_three += 1
-
-        elif run_len == 4:
-            if left_open and right_open:
-                live_four += 1
-            elif left_open or right_open:
-                blocked_four += 1
-
-        i = j
-    
-    # open jump two patterns
-    open_jump_two_patterns = [
-        [EMPTY, stone, EMPTY, stone, EMPTY],
-    ]
-
-    # blocked jump two patterns
-    blocked_jump_two_patterns = [
-        [stone, EMPTY, stone, EMPTY],
-        [EMPTY, stone, EMPTY, stone],
-    ]
-
-    # open jump two
-    for i in range(n - 4):
-        if line[i:i + 5] in open_jump_two_patterns:
-            jump_two += 1
-
-    # blocked jump two
-    for i in range(n - 3):
-        if line[i:i + 4] in blocked_jump_two_patterns:
-            blocked_jump_two += 1
-
-    # open jump three patterns
-    open_jump_three_patterns = [
-        [EMPTY, stone, stone, EMPTY, stone, EMPTY],
-        [EMPTY, stone, EMPTY, stone, stone, EMPTY],
-    ]
-
-    for i in range(n - 5):
-        if line[i:i + 6] in open_jump_three_patterns:
-            jump_three += 1
-
-    # blocked jump three patterns
-    blocked_jump_three_patterns = [
-        [stone, stone, EMPTY, stone, EMPTY],
-        [stone, EMPTY, stone, stone, EMPTY],
-        [EMPTY, stone, stone, EMPTY, stone],
-        [EMPTY, stone, EMPTY, stone, stone],
-    ]
-
-    for i in range(n - 4):
-        if line[i:i + 5] in blocked_jump_three_patterns:
-            blocked_jump_three += 1
-
-    # open jump four patterns
-    open_jump_four_patterns = [
-        [EMPTY, stone, stone, stone, EMPTY, stone, EMPTY],
-        [EMPTY, stone, stone, EMPTY, stone, stone, EMPTY],
-        [EMPTY, stone, EMPTY, stone, stone, stone, EMPTY],
-    ]
-
-    for i in range(n - 6):
-        if line[i:i + 7] in open_jump_four_patterns:
-            jump_four += 1
-
-    # blocked jump four patterns
-    blocked_jump_four_patterns = [
-        [stone, stone, stone, EMPTY, stone, EMPTY],
-        [stone, stone, EMPTY, stone, stone, EMPTY],
-        [stone, EMPTY, stone, stone, stone, EMPTY],
-        [EMPTY, stone, stone, stone, EMPTY, stone],
-        [EMPTY, stone, stone, EMPTY, stone, stone],
-        [EMPTY, stone, EMPTY, stone, stone, stone],
-    ]
-
-    for i in range(n - 5):
-        if line[i:i + 6] in blocked_jump_four_patterns:
-            blocked_jump_four += 1
 
+def _iter_lines(grid):
+    # iterate all rows, columns, and diagonals via the cached line tables
+    flat = [v for row in grid for v in row]
+    for line in line_tables(len(grid)).lines:
+        yield [flat[i] for i in line]
+
+
+def _iter_line_codes(grid):
+    # iterate (encoded line, length) for all lines; see _line_code
+    flat = [CELL_CODES[v] for row in grid for v in row]
+    for line in line_tables(len(grid)).lines:
+        yield _line_code([flat[i] for i in line]), len(line)
+
+
+def _line_code(values):
+    # encode cell codes 2 bits each, with a wall before and walls after
+    code = _WALL
+    shift = 2
+    for v in values:
+        code |= v << shift
+        shift += 2
+    return code | (_WALL_TAIL << shift)
+
+
+# memo of encoded line -> packed counts; cleared when it grows past the cap
+_LINE_COUNTS_CACHE = {}
+_LINE_COUNTS_CACHE_MAX = 1 << 16
+
+
+def _line_counts(code, length):
+    # packed pattern counts for both colours in one encoded line
+    total = _LINE_COUNTS_CACHE.get(code)
+    if total is not None:
+        return total
+
+    lut = _WINDOW_LUT
+    total = 0
+    for s in range(0, 2 * (length + 1), 2):
+        total += lut[(code >> s) & _WINDOW_MASK]
+
+    if len(_LINE_COUNTS_CACHE) >= _LINE_COUNTS_CACHE_MAX:
+        _LINE_COUNTS_CACHE.clear()
+    _LINE_COUNTS_CACHE[code] = total
+    return total
+
+
+# memo of encoded line -> per-cell count changes; cleared like the counts memo
+_LINE_POINTS_CACHE = {}
+
+
+def _line_point_deltas(code, length):
+    # threat index for one encoded line: for each colour, the packed count
+    # change if that colour played each cell (0 for occupied cells)
+    points = _LINE_POINTS_CACHE.get(code)
+    if points is not None:
+        return points
+
+    # only the windows covering a cell change when it is filled
+    lut = _WINDOW_LUT
+    points = []
+    for v in _STONE_CODES:
+        deltas = []
+        for pos in range(length):
+            shift = 2 * (pos + 1)
+            if (code >> shift) & 3:
+                deltas.append(0)
+                continue
+            filled = code | (v << shift)
+            delta = 0
+            for k in range(max(0, pos + 2 - _WINDOW), min(length, pos + 1) + 1):
+                delta += lut[(filled >> (2 * k)) & _WINDOW_MASK] - lut[(code >> (2 * k)) & _WINDOW_MASK]
+            deltas.append(delta)
+        points.append(tuple(deltas))
+    points = tuple(points)
+
+    if len(_LINE_POINTS_CACHE) >= _LINE_COUNTS_CACHE_MAX:
+        _LINE_POINTS_CACHE.clear()
+    _LINE_POINTS_CACHE[code] = points
+    return points
+
+
+# memo of (encoded line, stone, need) -> window points; cleared like the counts memo
+_LINE_WINDOWS_CACHE = {}
+
+
+def line_window_points(code, length, stone, need):
+    # positions of the empty cells in the WIN_LENGTH windows of an encoded
+    # line that hold need of stone's stones and none of the other colour's,
+    # listed once per such window
+    key = (code, stone, need)
+    points = _LINE_WINDOWS_CACHE.get(key)
+    if points is not None:
+        return points
+
+    own = CELL_CODES[stone]
+    values = [(code >> (2 * (pos + 1))) & 3 for pos in range(length)]
+    points = []
+    for s in range(length - WIN_LENGTH + 1):
+        window = values[s:s + WIN_LENGTH]
+        if window.count(own) == need and window.count(0) == WIN_LENGTH - need:
+            points.extend(s + k for k, v in enumerate(window) if v == 0)
+    points = tuple(points)
+
+    if len(_LINE_WINDOWS_CACHE) >= _LINE_COUNTS_CACHE_MAX:
+        _LINE_WINDOWS_CACHE.clear()
+    _LINE_WINDOWS_CACHE[key] = points
+    return points
+
+
+def _unpack_counts(packed, stone):
+    # unpack one colour's pattern counts from a packed total
+    base = (0 if stone == BLACK else len(PATTERN_NAMES)) * _FIELD_BITS
     return {
-        "live_two": live_two,
-        "blocked_two": blocked_two,
-        "live_three": live_three,
-        "blocked_three": blocked_three,
-        "live_four": live_four,
-        "blocked_four": blocked_four,
-        "jump_two": jump_two,
-        "blocked_jump_two": blocked_jump_two,
-        "jump_three": jump_three,
-        "blocked_jump_three": blocked_jump_three,
-        "jump_four": jump_four,
-        "blocked_jump_four": blocked_jump_four,
-    }
-
-
-def _collect_patterns(grid, stone):
-    # aggregate pattern counts over all lines
-    totals = {
-        "live_two": 0,
-        "blocked_two": 0,
-        "live_three": 0,
-        "blocked_three": 0,
-        "live_four": 0,
-        "blocked_four": 0,
-        "jump_two": 0,
-        "blocked_jump_two": 0,
-        "jump_three": 0,
-        "blocked_jump_three": 0,
-        "jump_four": 0,
-        "blocked_jump_four": 0,
+        name: (packed >> (base + i * _FIELD_BITS)) & _FIELD_MASK
+        for i, name in enumerate(PATTERN_NAMES)
     }
 
-    for line in _iter_lines(grid):
-        counts = _count_line_patterns(line, stone)
-        for k in totals:
-            totals[k] += counts[k]
 
-    return totals
+def _count_line_patterns(line, stone):
+    # count patterns in a single line
+    code = _line_code([CELL_CODES[v] for v in line])
+    return _unpack_counts(_line_counts(code, len(line)), stone)
+
+
+def _collect_patterns(grid):
+    # aggregate both colours' pattern counts in one traversal of each line
+    total = 0
+    for code, length in _iter_line_codes(grid):
+        total += _line_counts(code, length)
+    return {BLACK: _unpack_counts(total, BLACK), WHITE: _unpack_counts(total, WHITE)}
+
+
+def _side_values(packed, stone):
+    # one side's pattern counts and combo flags as float tuples
+    p = [(packed >> shift) & _FIELD_MASK for shift in _SIDE_SHIFTS[stone]]
+    live_three = p[_LIVE_THREE]
+    jump_three = p[_JUMP_THREE]
+    blocked_four = p[_BLOCKED_FOUR]
+    jump_four = p[_JUMP_FOUR]
+
+    combos = (
+        1.0 if live_three >= 2 else 0.0,
+        1.0 if jump_three >= 2 else 0.0,
+        1.0 if jump_three >= 1 and live_three >= 1 else 0.0,
+        1.0 if blocked_four >= 2 else 0.0,
+        1.0 if blocked_four >= 1 and jump_four >= 1 else 0.0,
+        1.0 if blocked_four >= 1 and live_three >= 1 else 0.0,
+        1.0 if blocked_four >= 1 and jump_three >= 1 else 0.0,
+        1.0 if jump_four >= 2 else 0.0,
+        1.0 if jump_four >= 1 and live_three >= 1 else 0.0,
+        1.0 if jump_four >= 1 and jump_three >= 1 else 0.0,
+    )
+    return tuple(map(float, p)), combos
+
+
+# memo of (packed total, stone) -> threat flags; totals repeat heavily
+# across sibling candidates, so the lookup beats re-decoding the fields
+_THREAT_FLAGS_CACHE = {}
+
+
+def threat_flags(packed, stone):
+    # (has three, double three, four-level threat) for stone's side of a
+    # packed total; the same thresholds as the combo features and
+    # evaluate's threat tiers
+    key = (packed, stone)
+    flags = _THREAT_FLAGS_CACHE.get(key)
+    if flags is not None:
+        return flags
+
+    shifts = _SIDE_SHIFTS[stone]
+    live_four = (packed >> shifts[_LIVE_FOUR]) & _FIELD_MASK
+    blocked_four = (packed >> shifts[_BLOCKED_FOUR]) & _FIELD_MASK
+    jump_four = (packed >> shifts[_JUMP_FOUR]) & _FIELD_MASK
+    live_three = (packed >> shifts[_LIVE_THREE]) & _FIELD_MASK
+    jump_three = (packed >> shifts[_JUMP_THREE]) & _FIELD_MASK
+
+    fours = blocked_four + jump_four
+    four = live_four > 0 or fours >= 2 or (fours >= 1 and (live_three or jump_three))
+    double_three = live_three >= 2 or jump_three >= 2 or (live_three >= 1 and jump_three >= 1)
+    three = live_three > 0 or jump_three > 0
+    flags = (three, double_three, four)
+
+    if len(_THREAT_FLAGS_CACHE) >= _LINE_COUNTS_CACHE_MAX:
+        _THREAT_FLAGS_CACHE.clear()
+    _THREAT_FLAGS_CACHE[key] = flags
+    return flags
+
+
+def threat_level_from_total(packed, stone):
+    # coarse 0-6 threat level of stone's side of a packed total, checking
+    # the highest tiers first and returning as soon as one is confirmed:
+    # 6 live four, 5 double four / blocked four + live three,
+    # 4 any jump or blocked four, 3 double three, 2 three, 1 two
+    shifts = _SIDE_SHIFTS[stone]
+    if (packed >> shifts[_LIVE_FOUR]) & _FIELD_MASK:
+        return 6
+
+    blocked_four = (packed >> shifts[_BLOCKED_FOUR]) & _FIELD_MASK
+    jump_four = (packed >> shifts[_JUMP_FOUR]) & _FIELD_MASK
+    live_three = (packed >> shifts[_LIVE_THREE]) & _FIELD_MASK
+    if blocked_four + jump_four >= 2 or (blocked_four and live_three):
+        return 5
+    if blocked_four or jump_four:
+        return 4
+
+    jump_three = (packed >> shifts[_JUMP_THREE]) & _FIELD_MASK
+    if live_three >= 2 or jump_three >= 2 or (live_three and jump_three):
+        return 3
+    if live_three or jump_three:
+        return 2
+
+    if (packed >> shifts[_LIVE_TWO]) & _FIELD_MASK or (packed >> shifts[_JUMP_TWO]) & _FIELD_MASK:
+        return 1
+    return 0
+
+
+def threat_level(board, stone):
+    # coarse 0-6 threat level of stone on board, read from the board's
+    # incremental pattern totals (see threat_level_from_total)
+    return threat_level_from_total(feature_accumulator(board).total, stone)
+
+
+def _line_open_four(code, length, pos, stone):
+    # True if stone on the empty position pos of an encoded line leaves a
+    # cell there that makes a four with two five points (an open four)
+    v = CELL_CODES[stone]
+    code |= v << (2 * (pos + 1))
+    for gain in set(line_window_points(code, length, stone, 3)):
+        four = code | (v << (2 * (gain + 1)))
+        if len(set(line_window_points(four, length, stone, 4))) >= 2:
+            return True
+    return False
+
+
+def threat_moves(board, stone, moves):
+    # {move: threat level after it} (see threat_level_from_total) for the
+    # empty moves that raise any of stone's four counts, or its live or
+    # jump three count with a three that can still become an open four;
+    # a dead three (e.g. O . X X X . O) only leads to fours with one five
+    # point, so it does not force a reply
+    acc = feature_accumulator(board)
+    shifts = _SIDE_SHIFTS[stone]
+    before = acc.total
+    n = board.size
+    threats = {}
+    for move in moves:
+        r, c = move
+        idx = r * n + c
+        after = acc.total_after(idx, stone)
+        if after == before:
+            continue
+        raised = {
+            p for p in _FOUR_PATTERNS + _THREE_PATTERNS
+            if (after >> shifts[p]) & _FIELD_MASK > (before >> shifts[p]) & _FIELD_MASK
+        }
+        if not raised:
+            continue
+        if not raised.isdisjoint(_FOUR_PATTERNS) or any(
+            _line_open_four(acc.codes[line_id], acc._lengths[line_id], pos, stone)
+            for line_id, pos in acc._through[idx]
+        ):
+            threats[move] = threat_level_from_total(after, stone)
+    return threats
 
 
-def extract_features(board, stone):
-    # extract global features for both sides
+def _perspective_values(cell_counts, stone, my_side, opp_side):
+    # feature values in FEATURE_NAMES order from per-side tuples
     opp = _other(stone)
-    grid = board.grid
-    n = board.size
+    my_patterns, my_combos = my_side
+    opp_patterns, opp_combos = opp_side
+    counts = (
+        float(cell_counts[CELL_CODES[stone]]),
+        float(cell_counts[CELL_CODES[opp]]),
+        float(cell_counts[CELL_CODES[EMPTY]]),
+    )
+    return counts + my_patterns + opp_patterns + my_combos + opp_combos
+
+
+class FeatureAccumulator:
+    # per-line packed pattern counts for one board, attached as a tracker
+    # and updated on push/pop by re-counting only the lines through the move;
+    # both colours and stone counts come from the same pass, and the feature
+    # values for each perspective are cached until the next change
+
+    KEY = "features"
+
+    def __init__(self, board):
+        # encode and count every line once
+        tables = line_tables(board.size)
+        self._lengths = [len(line) for line in tables.lines]
+        self._through = tables.through
+
+        cells = board.cells
+        self.codes = [_line_code([cells[i] for i in line]) for line in tables.lines]
+        self.counts = [
+            _line_counts(code, length)
+            for code, length in zip(self.codes, self._lengths)
+        ]
+        self.total = sum(self.counts)
+        # threat index rows, filled lazily per line by total_after
+        self.points = [None] * len(self.codes)
+
+        # cells per code: empty, black, white
+        codes = cells.tobytes()
+        self.cell_counts = [codes.count(v) for v in range(3)]
+
+        self._sides = {}
+        self._views = {}
+
+    def changed(self, board, idx):
+        # re-encode and re-count the (up to) four lines through idx
+        v = board.cells[idx]
+        codes = self.codes
+        counts = self.counts
+        points = self.points
+        total = self.total
+        old = None
+        for line_id, pos in self._through[idx]:
+            shift = 2 * (pos + 1)
+            code = codes[line_id]
+            old = (code >> shift) & 3
+            code = (code & ~(3 << shift)) | (v << shift)
+            codes[line_id] = code
+            length = self._lengths[line_id]
+            new = _line_counts(code, length)
+            total += new - counts[line_id]
+            counts[line_id] = new
+            points[line_id] = None
+        self.total = total
+
+        if old is None:
+            # 1x1 boards have no lines; fall back to a recount
+            raw = board.cells.tobytes()
+            self.cell_counts = [raw.count(c) for c in range(3)]
+        else:
+            self.cell_counts[old] -= 1
+            self.cell_counts[v] += 1
+
+        if self._views or self._sides:
+            self._sides = {}
+            self._views = {}
+
+    def side(self, stone):
+        # cached (pattern values, combo values) for one colour
+        values = self._sides.get(stone)
+        if values is None:
+            values = _side_values(self.total, stone)
+            self._sides[stone] = values
+        return values
+
+    def values(self, stone):
+        # cached feature values from stone's perspective in FEATURE_NAMES
+        # order; the opposite perspective reuses the same side values swapped
+        values = self._views.get(stone)
+        if values is None:
+            values = _perspective_values(
+                self.cell_counts, stone, self.side(stone), self.side(_other(stone))
+            )
+            self._views[stone] = values
+        return values
+
+    def total_after(self, idx, stone):
+        # packed totals if stone were placed on the empty cell idx, from the
+        # per-line threat index of the (up to) four lines through idx
+        ci = CELL_CODES[stone] - 1
+        points = self.points
+        total = self.total
+        for line_id, pos in self._through[idx]:
+            row = points[line_id]
+            if row is None:
+                row = self._row(line_id)
+            total += row[ci][pos]
+        return total
+
+    def total_after_pair(self, first, second, stone):
+        # packed totals if stone were placed on two distinct empty cells;
+        # only a line through both is re-counted with the first stone in
+        ci = CELL_CODES[stone] - 1
+        v = CELL_CODES[stone]
+        first_lines = dict(self._through[first])
+        total = self.total_after(first, stone)
+        for line_id, pos in self._through[second]:
+            first_pos = first_lines.get(line_id)
+            if first_pos is None:
+                total += self._row(line_id)[ci][pos]
+            else:
+                code = self.codes[line_id] | (v << (2 * (first_pos + 1)))
+                total += _line_point_deltas(code, self._lengths[line_id])[ci][pos]
+        return total
+
+    def _row(self, line_id):
+        # threat index row of one line, computed on first use
+        row = self.points[line_id]
+        if row is None:
+            row = _line_point_deltas(self.codes[line_id], self._lengths[line_id])
+            self.points[line_id] = row
+        return row
+
+    def values_after(self, idx, stone, perspective, total=None):
+        # feature values from perspective if stone were placed on the
+        # empty cell idx, without touching the board; total may pass in
+        # an already computed total_after(idx, stone)
+        if total is None:
+            total = self.total_after(idx, stone)
+        cell_counts = self.cell_counts[:]
+        cell_counts[CELL_CODES[EMPTY]] -= 1
+        cell_counts[CELL_CODES[stone]] += 1
+        return _perspective_values(
+            cell_counts,
+            perspective,
+            _side_values(total, perspective),
+            _side_values(total, _other(perspective)),
+        )
+
+    def copy(self):
+        # copy line state for a copied board
+        acc = FeatureAccumulator.__new__(FeatureAccumulator)
+        acc._lengths = self._lengths
+        acc._through = self._through
+        acc.codes = self.codes[:]
+        acc.counts = self.counts[:]
+        acc.total = self.total
+        acc.points = self.points[:]
+        acc.cell_counts = self.cell_counts[:]
+        acc._sides = dict(self._sides)
+        acc._views = dict(self._views)
+        return acc
+
+
+def feature_accumulator(board):
+    # return the board's accumulator, attaching one on first use
+    acc = board.tracker(FeatureAccumulator.KEY)
+    if acc is None:
+        acc = FeatureAccumulator(board)
+        board.attach(FeatureAccumulator.KEY, acc)
+    return acc
 
-    my_count = 0
-    opp_count = 0
-    empty_count = 0
-
-    for r in range(n):
-        for c in range(n):
-            v = grid[r][c]
-            if v == stone:
-                my_count += 1
-            elif v == opp:
-                opp_count += 1
-            elif v == EMPTY:
-                empty_count += 1
-
-    my_patterns = _collect_patterns(grid, stone)
-    opp_patterns = _collect_patterns(grid, opp)
-
-    # derived combo features
-    my_double_live_three = 1.0 if my_patterns["live_three"] >= 2 else 0.0
-    opp_double_live_three = 1.0 if opp_patterns["live_three"] >= 2 else 0.0
-
-    my_double_jump_three = 1.0 if my_patterns["jump_three"] >= 2 else 0.0
-    opp_double_jump_three = 1.0 if opp_patterns["jump_three"] >= 2 else 0.0
-
-    my_jump3_and_live3 = 1.0 if my_patterns["jump_three"] >= 1 and my_patterns["live_three"] >= 1 else 0.0
-    opp_jump3_and_live3 = 1.0 if opp_patterns["jump_three"] >= 1 and opp_patterns["live_three"] >= 1 else 0.0
-
-    my_double_blocked_four = 1.0 if my_patterns["blocked_four"] >= 2 else 0.0
-    opp_double_blocked_four = 1.0 if opp_patterns["blocked_four"] >= 2 else 0.0
-
-    my_blocked4_and_jump4 = 1.0 if my_patterns["blocked_four"] >= 1 and my_patterns["jump_four"] >= 1 else 0.0
-    opp_blocked4_and_jump4 = 1.0 if opp_patterns["blocked_four"] >= 1 and opp_patterns["jump_four"] >= 1 else 0.0
-
-    my_blocked4_and_live3 = 1.0 if my_patterns["blocked_four"] >= 1 and my_patterns["live_three"] >= 1 else 0.0
-    opp_blocked4_and_live3 = 1.0 if opp_patterns["blocked_four"] >= 1 and opp_patterns["live_three"] >= 1 else 0.0
-
-    my_blocked4_and_jump3 = 1.0 if my_patterns["blocked_four"] >= 1 and my_patterns["jump_three"] >= 1 else 0.0
-    opp_blocked4_and_jump3 = 1.0 if opp_patterns["blocked_four"] >= 1 and opp_patterns["jump_three"] >= 1 else 0.0
-
-    my_double_jump_four = 1.0 if my_patterns["jump_four"] >= 2 else 0.0
-    opp_double_jump_four = 1.0 if opp_patterns["jump_four"] >= 2 else 0.0
-
-    my_jump4_and_live3 = 1.0 if my_patterns["jump_four"] >= 1 and my_patterns["live_three"] >= 1 else 0.0
-    opp_jump4_and_live3 = 1.0 if opp_patterns["jump_four"] >= 1 and opp_patterns["live_three"] >= 1 else 0.0
-
-    my_jump4_and_jump3 = 1.0 if my_patterns["jump_four"] >= 1 and my_patterns["jump_three"] >= 1 else 0.0
-    opp_jump4_and_jump3 = 1.0 if opp_patterns["jump_four"] >= 1 and opp_patterns["jump_three"] >= 1 else 0.0
-
-    feats = {
-        # counts
-        "my_stones": float(my_count),
-        "opp_stones": float(opp_count),
-        "empty": float(empty_count),
-
-        # my patterns
-        "my_live_two": float(my_patterns["live_two"]),
-        "my_blocked_two": float(my_patterns["blocked_two"]),
-        "my_live_three": float(my_patterns["live_three"]),
-        "my_blocked_three": float(my_patterns["blocked_three"]),
-        "my_live_four": float(my_patterns["live_four"]),
-        "my_blocked_four": float(my_patterns["blocked_four"]),
-        "my_jump_two": float(my_patterns["jump_two"]),
-        "my_blocked_jump_two": float(my_patterns["blocked_jump_two"]),
-        "my_jump_three": float(my_patterns["jump_three"]),
-        "my_blocked_jump_three": float(my_patterns["blocked_jump_three"]),
-        "my_jump_four": float(my_patterns["jump_four"]),
-        "my_blocked_jump_four": float(my_patterns["blocked_jump_four"]),
-
-        # opponent patterns
-        "opp_live_two": float(opp_patterns["live_two"]),
-        "opp_blocked_two": float(opp_patterns["blocked_two"]),
-        "opp_live_three": float(opp_patterns["live_three"]),
-        "opp_blocked_three": float(opp_patterns["blocked_three"]),
-        "opp_live_four": float(opp_patterns["live_four"]),
-        "opp_blocked_four": float(opp_patterns["blocked_four"]),
-        "opp_jump_two": float(opp_patterns["jump_two"]),
-        "opp_blocked_jump_two": float(opp_patterns["blocked_jump_two"]),
-        "opp_jump_three": float(opp_patterns["jump_three"]),
-        "opp_blocked_jump_three": float(opp_patterns["blocked_jump_three"]),
-        "opp_jump_four": float(opp_patterns["jump_four"]),
-        "opp_blocked_jump_four": float(opp_patterns["blocked_jump_four"]),
-
-        # combo features
-        "my_double_live_three": my_double_live_three,
-        "my_double_jump_three": my_double_jump_three,
-        "my_jump3_and_live3": my_jump3_and_live3,
-        "my_double_blocked_four": my_double_blocked_four,
-        "my_blocked4_and_jump4": my_blocked4_and_jump4,
-        "my_blocked4_and_live3": my_blocked4_and_live3,
-        "my_blocked4_and_jump3": my_blocked4_and_jump3,
-        "my_double_jump_four": my_double_jump_four,
-        "my_jump4_and_live3": my_jump4_and_live3,
-        "my_jump4_and_jump3": my_jump4_and_jump3,
-
-        "opp_double_live_three": opp_double_live_three,
-        "opp_double_jump_three": opp_double_jump_three,
-        "opp_jump3_and_live3": opp_jump3_and_live3,
-        "opp_double_blocked_four": opp_double_blocked_four,
-        "opp_blocked4_and_jump4": opp_blocked4_and_jump4,
-        "opp_blocked4_and_live3": opp_blocked4_and_live3,
-        "opp_blocked4_and_jump3": opp_blocked4_and_jump3,
-        "opp_double_jump_four": opp_double_jump_four,
-        "opp_jump4_and_live3": opp_jump4_and_live3,
-        "opp_jump4_and_jump3": opp_jump4_and_jump3,
-    }
 
-    return feats
+def extract_features(board, stone):
+    # extract global features for both sides as a name -> value dict
+    return dict(zip(FEATURE_NAMES, feature_accumulator(board).values(stone)))
+
+
+def extract_features_vector(board, stone, as_numpy=False):
+    # extract features as a flat vector in FEATURE_NAMES order
+    values = feature_accumulator(board).values(stone)
+    if as_numpy:
+        import numpy as np
+
+        return np.array(values, dtype=np.float64)
+    return array("d", values)
+
+
+# window LUT unpacked to per-field counts, built on first batch call
+_WINDOW_FIELDS = None
+
+
+def _window_fields(np):
+    # (windows, 2 * len(PATTERN_NAMES)) array of the counts packed in _WINDOW_LUT
+    global _WINDOW_FIELDS
+    if _WINDOW_FIELDS is None:
+        n_fields = 2 * len(PATTERN_NAMES)
+        packed = np.array(_WINDOW_LUT, dtype=object)
+        _WINDOW_FIELDS = np.stack(
+            [(packed >> (f * _FIELD_BITS)) & _FIELD_MASK for f in range(n_fields)],
+            axis=1,
+        ).astype(np.int32)
+    return _WINDOW_FIELDS
+
+
+def extract_features_batch(boards, stones, chunk=4096):
+    # feature matrix (N, len(FEATURE_NAMES)) for many boards, matching
+    # extract_features row by row
+    # boards: (N, size, size) int8 array of CELL_CODES, or a sequence of Boards
+    # stones: one perspective for every board, or one per board
+    # Requires numpy; every line is gathered into a wall-padded array, the
+    # 7-cell windows are read through a strided view, and window codes are
+    # looked up in the same pattern LUT the per-line counter uses
+    import numpy as np
+    from numpy.lib.stride_tricks import sliding_window_view
+
+    if not isinstance(boards, np.ndarray):
+        boards = list(boards)
+        n_boards = len(boards)
+    else:
+        n_boards = boards.shape[0]
+
+    # stones are checked the same way whether or not there are boards
+    if isinstance(stones, str):
+        stones = [stones]
+    stones = list(stones)
+    if any(s not in (BLACK, WHITE) for s in stones):
+        raise ValueError("stones must be BLACK or WHITE")
+    if len(stones) == 1:
+        stones = stones * n_boards
+    elif len(stones) != n_boards:
+        raise ValueError("stones must be one stone or one per board")
+
+    if n_boards == 0:
+        return np.zeros((0, len(FEATURE_NAMES)), dtype=np.float64)
+    if not isinstance(boards, np.ndarray):
+        boards = np.stack([
+            np.frombuffer(b.cells, dtype=np.int8).reshape(b.size, b.size)
+            for b in boards
+        ])
+
+    n_boards, n, _ = boards.shape
+    out = np.zeros((n_boards, len(FEATURE_NAMES)), dtype=np.float64)
+    black_view = np.array([s == BLACK for s in stones], dtype=bool)
+
+    # line cells at positions 1..len, walls before and after (flat index
+    # n * n is a wall cell), so windows match _line_code
+    lines = line_tables(n).lines
+    max_len = max((len(line) for line in lines), default=0)
+    index = np.full((len(lines), max_len + _WINDOW), n * n, dtype=np.intp)
+    for i, line in enumerate(lines):
+        index[i, 1:len(line) + 1] = line
+    powers = 4 ** np.arange(_WINDOW, dtype=np.int32)
+    fields = _window_fields(np)
+
+    flat = np.full((n_boards, n * n + 1), _WALL, dtype=np.int32)
+    flat[:, :n * n] = boards.reshape(n_boards, n * n)
+
+    # most windows hold no pattern; only the others are summed per board
+    counted = fields.any(axis=1)
+    totals = np.zeros((n_boards, fields.shape[1]), dtype=np.int64)
+    for start in range(0, n_boards, chunk):
+        cells = flat[start:start + chunk][:, index]
+        codes = sliding_window_view(cells, _WINDOW, axis=2) @ powers
+        codes = codes.reshape(len(cells), -1)
+        rows, cols = np.nonzero(counted[codes])
+        hits = fields[codes[rows, cols]]
+        for f in range(fields.shape[1]):
+            totals[start:start + chunk, f] = np.bincount(
+                rows, weights=hits[:, f], minlength=len(cells)
+            )
+
+    n_patterns = len(PATTERN_NAMES)
+    black, white = totals[:, :n_patterns], totals[:, n_patterns:]
+    view = black_view[:, None]
+    my = np.where(view, black, white)
+    opp = np.where(view, white, black)
+
+    black_stones = (flat[:, :n * n] == CELL_CODES[BLACK]).sum(axis=1)
+    white_stones = (flat[:, :n * n] == CELL_CODES[WHITE]).sum(axis=1)
+    out[:, 0] = np.where(black_view, black_stones, white_stones)
+    out[:, 1] = np.where(black_view, white_stones, black_stones)
+    out[:, 2] = n * n - black_stones - white_stones
+
+    combo_at = 3 + 2 * n_patterns
+    for side, p_col, c_col in ((my, 3, combo_at), (opp, 3 + n_patterns, combo_at + len(COMBO_NAMES))):
+        out[:, p_col:p_col + n_patterns] = side
+        live_three = side[:, _LIVE_THREE]
+        jump_three = side[:, _JUMP_THREE]
+        blocked_four = side[:, _BLOCKED_FOUR]
+        jump_four = side[:, _JUMP_FOUR]
+        combos = (
+            live_three >= 2,
+            jump_three >= 2,
+            (jump_three >= 1) & (live_three >= 1),
+            blocked_four >= 2,
+            (blocked_four >= 1) & (jump_four >= 1),
+            (blocked_four >= 1) & (live_three >= 1),
+            (blocked_four >= 1) & (jump_three >= 1),
+            jump_four >= 2,
+            (jump_four >= 1) & (live_three >= 1),
+            (jump_four >= 1) & (jump_three >= 1),
+        )
+        for k, flag in enumerate(combos):
+            out[:, c_col + k] = flag
+
+    return out
 
 
 def featurize_after_move(board, stone, move):
     # features after applying move
-    b2 = board.copy()
-    ok = b2.place(move, stone)
-    if not ok:
+    if not board.push(move, stone):
         return extract_features(board, stone)
-    return extract_features(b2, stone)
\ No newline at end of file
+    feats = extract_features(board, stone)
+    board.pop()
+    return feats
\ No newline at end of file
@@ -28,7 +28,7 @@ def play_one_game(rl_agent, opponent, board_size, rl_stone):
     stone = BLACK
     rl_transitions = []
 
-    while not rules.is_terminal(board.grid):
+    while rules.status(board) == rules.ONGOING:
         board_before = board.copy()
 
         if stone == rl_stone:
@@ -38,7 +38,7 @@ def play_one_game(rl_agent, opponent, board_size, rl_stone):
 
         board.place(move, stone)
         next_stone = WHITE if stone == BLACK else BLACK
-        done = rules.is_terminal(board.grid)
+        done = rules.status(board) != rules.ONGOING
 
         if stone == rl_stone:
             rl_transitions.append(
@@ -47,7 +47,8 @@ def play_one_game(rl_agent, opponent, board_size, rl_stone):
 
         stone = next_stone
 
-    w = rules.winner(board.grid)
+    result = rules.status(board)
+    w = None if result == rules.DRAW else result
     return w, rl_transitions
 
 
@@ -76,7 +77,7 @@ def assign_rewards(transitions, winner, rl_stone):
 
         must_defend_three = (opp_three_pressure > 0.0 and not my_attack_ready)
 
-        if rules.winner(next_board.grid) == rl_stone:
+        if rules.winner(next_board) == rl_stone:
             shaped += 10000.0
 
         if must_defend_three:
@@ -271,12 +272,13 @@ def evaluate_vs(weights_path, opponent_type="random", board_size=9, games=100, s
             rl_stone = WHITE
 
         stone = BLACK
-        while not rules.is_terminal(board.grid):
+        while rules.status(board) == rules.ONGOING:
             move = agents[stone].select_move(board, stone)
             board.place(move, stone)
             stone = WHITE if stone == BLACK else BLACK
 
-        w = rules.winner(board.grid)
+        result = rules.status(board)
+        w = None if result == rules.DRAW else result
         if w == rl_stone:
             rl_wins += 1
         elif w is None:
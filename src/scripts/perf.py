@@ -0,0 +1,217 @@
+import argparse
+import random
+import sys
+import time
+import tracemalloc
+from gomoku.board import Board, BLACK, WHITE, EMPTY
+from gomoku import rules
+from agents.ab_agent import AlphaBetaAgent
+from heuristics.features import extract_features, extract_features_batch
+
+
+def random_positions(count, size=15, stones=20, seed=0):
+    # Build reproducible midgame positions by playing near existing stones
+    rng = random.Random(seed)
+    positions = []
+
+    while len(positions) < count:
+        board = Board(size)
+        stone = BLACK
+        for _ in range(stones):
+            move = rng.choice(board.candidate_moves(radius=1))
+            board.place(move, stone)
+            stone = WHITE if stone == BLACK else BLACK
+            if rules.winner(board) is not None:
+                break
+        if rules.winner(board) is None:
+            positions.append((board, stone))
+
+    return positions
+
+
+def _expand_copy(board, move, stone):
+    # Child expansion as the search did it before push/pop
+    child = board.copy()
+    child.place(move, stone)
+    rules.winner(child)
+
+
+def _expand_push(board, move, stone):
+    # Child expansion with in-place make/unmake
+    board.push(move, stone)
+    rules.winner(board)
+    board.pop()
+
+
+def _time_per_node(expand, positions, reps):
+    # Return microseconds per expanded child
+    nodes = 0
+    t0 = time.perf_counter()
+    for _ in range(reps):
+        for board, stone in positions:
+            for move in board.candidate_moves():
+                expand(board, move, stone)
+                nodes += 1
+    return (time.perf_counter() - t0) * 1e6 / nodes
+
+
+def _bytes_per_node(expand, positions):
+    # Return peak bytes allocated while expanding one child, averaged
+    nodes = 0
+    total = 0
+    tracemalloc.start()
+    try:
+        for board, stone in positions:
+            for move in board.candidate_moves():
+                base = tracemalloc.get_traced_memory()[0]
+                tracemalloc.reset_peak()
+                expand(board, move, stone)
+                total += tracemalloc.get_traced_memory()[1] - base
+                nodes += 1
+    finally:
+        tracemalloc.stop()
+    return total / nodes
+
+
+def bench_nodes(positions, reps):
+    # Compare copy-per-child against push/pop expansion
+    print(f"{'expansion':<12}{'us/node':>10}{'bytes/node':>12}")
+    for label, expand in (("copy", _expand_copy), ("push/pop", _expand_push)):
+        us = _time_per_node(expand, positions, reps)
+        nbytes = _bytes_per_node(expand, positions)
+        print(f"{label:<12}{us:>10.2f}{nbytes:>12.0f}")
+
+
+def _deep_sizeof(obj, seen=None):
+    # Approximate retained size of nested dicts/tuples/lists in bytes
+    if seen is None:
+        seen = set()
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        for k, v in obj.items():
+            size += _deep_sizeof(k, seen) + _deep_sizeof(v, seen)
+    elif isinstance(obj, (tuple, list)):
+        for v in obj:
+            size += _deep_sizeof(v, seen)
+    return size
+
+
+def bench_search(positions, depth, node_budget):
+    # Run AlphaBetaAgent on each position and report nodes, time, TT size
+    # and feature cache hit rate
+    print(f"{'pos':>4}{'nodes':>8}{'ms':>10}{'tt':>8}{'tt KB':>10}{'B/entry':>10}{'cache hit':>11}")
+    for i, (board, stone) in enumerate(positions):
+        agent = AlphaBetaAgent(max_depth=depth, node_budget=node_budget, time_budget_ms=10**9, use_vcf=False)
+        t0 = time.perf_counter()
+        agent.select_move(board, stone)
+        ms = (time.perf_counter() - t0) * 1000.0
+
+        entries = len(agent._tt)
+        slots = agent._tt._slots
+        nbytes = _deep_sizeof(slots)
+        per_entry = (nbytes - sys.getsizeof(slots)) / entries if entries else 0.0
+        hit_rate = agent._cache.stats()["hit_rate"]
+        print(
+            f"{i:>4}{agent._nodes:>8}{ms:>10.1f}{entries:>8}{nbytes / 1024:>10.1f}"
+            f"{per_entry:>10.0f}{hit_rate:>11.1%}"
+        )
+
+
+def bench_depth(positions, depth):
+    # Report nodes (cumulative over iterative deepening) and time needed
+    # to complete each depth, with no node or time budget
+    print(f"{'pos':>4}" + "".join(f"{'d' + str(d):>10}" for d in range(1, depth + 1)) + f"{'ms':>10}")
+    totals = [0] * depth
+    for i, (board, stone) in enumerate(positions):
+        agent = AlphaBetaAgent(max_depth=depth, node_budget=10**9, time_budget_ms=10**9, use_vcf=False)
+        t0 = time.perf_counter()
+        agent.select_move(board, stone)
+        ms = (time.perf_counter() - t0) * 1000.0
+        for d, nodes in enumerate(agent.depth_nodes):
+            totals[d] += nodes
+        print(f"{i:>4}" + "".join(f"{n:>10}" for n in agent.depth_nodes) + f"{ms:>10.1f}")
+    print(f"{'sum':>4}" + "".join(f"{n:>10}" for n in totals))
+
+
+def bench_winners(count, size, seed):
+    # Compare per-grid winner scans against one winner_batch call
+    import numpy as np
+
+    rng = np.random.default_rng(seed)
+    arr = rng.choice(np.array([0, 1, 2], dtype=np.int8), size=(count, size, size), p=[0.6, 0.2, 0.2])
+    symbols = (EMPTY, BLACK, WHITE)
+    grids = [tuple(tuple(symbols[v] for v in row) for row in g) for g in arr.tolist()]
+
+    t0 = time.perf_counter()
+    single = [rules.winner(g) for g in grids]
+    t_single = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    batch = rules.winner_batch(arr)
+    t_batch = time.perf_counter() - t0
+
+    assert single == batch
+    print(f"{'method':<14}{'boards/s':>12}")
+    print(f"{'winner':<14}{count / t_single:>12.0f}")
+    print(f"{'winner_batch':<14}{count / t_batch:>12.0f}")
+
+
+def bench_features(positions):
+    # Compare per-board extract_features against one extract_features_batch call
+    # (fresh boards, so the per-board path pays for building its accumulator)
+    boards = [Board.from_bytes(board.to_bytes()) for board, _ in positions]
+    stones = [stone for _, stone in positions]
+
+    t0 = time.perf_counter()
+    for board, stone in zip(boards, stones):
+        extract_features(board, stone)
+    t_single = time.perf_counter() - t0
+
+    extract_features_batch(boards[:1], stones[:1])  # one-time LUT setup
+    t0 = time.perf_counter()
+    extract_features_batch(boards, stones)
+    t_batch = time.perf_counter() - t0
+
+    count = len(positions)
+    print(f"{'method':<24}{'positions/s':>12}")
+    print(f"{'extract_features':<24}{count / t_single:>12.0f}")
+    print(f"{'extract_features_batch':<24}{count / t_batch:>12.0f}")
+
+
+def main():
+    # CLI entry point for micro-benchmarks of engine hot paths
+    parser = argparse.ArgumentParser(description="Micro-benchmarks for board and search hot paths.")
+    parser.add_argument("bench", choices=["nodes", "search", "depth", "winners", "features"])
+    parser.add_argument("--positions", type=int, default=20)
+    parser.add_argument("--stones", type=int, default=20)
+    parser.add_argument("--size", type=int, default=15)
+    parser.add_argument("--reps", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--depth", type=int, default=2)
+    parser.add_argument("--node-budget", type=int, default=5000)
+    args = parser.parse_args()
+
+    if args.bench == "winners":
+        bench_winners(args.positions, args.size, args.seed)
+        return 0
+
+    positions = random_positions(args.positions, size=args.size, stones=args.stones, seed=args.seed)
+
+    if args.bench == "nodes":
+        bench_nodes(positions, args.reps)
+    elif args.bench == "search":
+        bench_search(positions, args.depth, args.node_budget)
+    elif args.bench == "depth":
+        bench_depth(positions, args.depth)
+    elif args.bench == "features":
+        bench_features(positions)
+
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
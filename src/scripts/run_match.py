@@ -37,10 +37,10 @@ def play_match(black_name, white_name, seed=None, print_board=False, max_illegal
             print(game.board)
             print()
 
-    w = game.winner()
-    if w is None and rules.is_draw(game.board.grid):
+    result = rules.status(game.board)
+    if result == rules.DRAW:
         return None
-    return w
+    return result
 
 
 def main():
@@ -0,0 +1,63 @@
+import argparse
+import sys
+import time
+from gomoku.board import Board, BLACK, WHITE
+from search.vcf import DEFAULT_VCF_NODES, VCFSolver
+from search.vct import DEFAULT_VCT_NODES, VCTSolver
+
+
+def side_to_move(board):
+    # BLACK moves first, so it is to move whenever the stone count is even
+    return BLACK if board.stone_count % 2 == 0 else WHITE
+
+
+def solve_position(board, stone, solver="vct", max_nodes=None, time_budget_ms=None):
+    # Run one threat-space solver; return (line or None, complete, nodes, ms)
+    if solver == "vcf":
+        s = VCFSolver(max_nodes=DEFAULT_VCF_NODES if max_nodes is None else max_nodes)
+    else:
+        s = VCTSolver(max_nodes=DEFAULT_VCT_NODES if max_nodes is None else max_nodes)
+
+    t0 = time.perf_counter()
+    line = s.solve(board, stone, time_budget_ms=time_budget_ms)
+    ms = (time.perf_counter() - t0) * 1000.0
+    return line, s.complete, s.nodes, ms
+
+
+def main():
+    # CLI entry point: prove or disprove a forced win in a packed position
+    parser = argparse.ArgumentParser(description="Search a position for a forced VCF/VCT win.")
+    parser.add_argument("position", help="board packed with Board.to_base64")
+    parser.add_argument("--stone", choices=[BLACK, WHITE], default=None, help="attacker (default: side to move)")
+    parser.add_argument("--solver", choices=["vcf", "vct"], default="vct")
+    parser.add_argument("--nodes", type=int, default=None)
+    parser.add_argument("--time-ms", type=float, default=None)
+    parser.add_argument("--print-board", action="store_true")
+    args = parser.parse_args()
+
+    try:
+        board = Board.from_base64(args.position)
+    except ValueError as e:
+        print(str(e), file=sys.stderr)
+        return 2
+
+    stone = args.stone or side_to_move(board)
+    if args.print_board:
+        print(board)
+        print()
+
+    line, complete, nodes, ms = solve_position(board, stone, args.solver, args.nodes, args.time_ms)
+    name = args.solver.upper()
+    if line is not None:
+        print(f"{name} win for {stone}: " + " ".join(f"{r},{c}" for r, c in line))
+    elif complete:
+        print(f"No {name} win for {stone}")
+    else:
+        print(f"Unknown: {name} budget exhausted for {stone}")
+    print(f"nodes: {nodes}  time: {ms:.1f} ms")
+
+    return 0 if line is not None else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
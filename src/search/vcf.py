@@ -0,0 +1,190 @@
+import time
+from collections import Counter
+from gomoku.board import BLACK, WHITE, CELL_CODES, WIN_LENGTH
+from gomoku.lines import line_tables
+from heuristics.features import feature_accumulator, line_window_points
+
+# default limits for one solve() call and for the result cache
+DEFAULT_VCF_NODES = 20000
+DEFAULT_VCF_ENTRIES = 1 << 16
+
+
+class _Cutoff(Exception):
+    # raised when the node or time budget runs out
+    pass
+
+
+def window_points(board, stone, need):
+    # Counter of empty cells in five-cell windows holding need of stone's
+    # stones and none of the opponent's, keyed by flat index; need=4 gives
+    # the cells that win at once, need=3 the cells that make a four; read
+    # from the encoded lines the board's feature accumulator keeps
+    tables = line_tables(board.size)
+    codes = feature_accumulator(board).codes
+    points = Counter()
+    for line_id in tables.win_lines:
+        line = tables.lines[line_id]
+        for pos in line_window_points(codes[line_id], len(line), stone, need):
+            points[line[pos]] += 1
+    return points
+
+
+def _lines_points(board, line_ids, stone, need):
+    # window_points restricted to the given lines
+    tables = line_tables(board.size)
+    codes = feature_accumulator(board).codes
+    points = Counter()
+    for line_id in line_ids:
+        line = tables.lines[line_id]
+        if len(line) >= WIN_LENGTH:
+            for pos in line_window_points(codes[line_id], len(line), stone, need):
+                points[line[pos]] += 1
+    return points
+
+
+def points_through(board, idx, stone, need):
+    # sorted window_points restricted to the windows that contain flat
+    # cell idx
+    tables = line_tables(board.size)
+    cells = board.cells
+    own = CELL_CODES[stone]
+    points = set()
+    for line_id, pos in tables.through[idx]:
+        line = tables.lines[line_id]
+        lo = max(0, pos - WIN_LENGTH + 1)
+        hi = min(pos, len(line) - WIN_LENGTH)
+        for s in range(lo, hi + 1):
+            window = [cells[i] for i in line[s:s + WIN_LENGTH]]
+            if window.count(own) == need and window.count(0) == WIN_LENGTH - need:
+                points.update(line[s + k] for k, v in enumerate(window) if v == 0)
+    return sorted(points)
+
+
+def five_points_through(board, idx, stone):
+    # flat indices of the cells that would win for stone, on the lines
+    # through flat cell idx only
+    return points_through(board, idx, stone, WIN_LENGTH - 1)
+
+
+class VCFSolver:
+    # Victory-by-continuous-fours search. The attacker only plays moves
+    # that make a four, so each defender reply is forced (the single cell
+    # that would complete five). An attacker with an open or double four
+    # wins outright. A defender five threat must be blocked first, so when
+    # the defender has one the attacker may only play that cell.
+    # Results are cached by (position hash, attacker) with the stone count
+    # as a collision check; a result does not depend on how the position was
+    # reached, so the cache is kept across calls. Budget-limited searches
+    # cache only the subtrees they finished.
+
+    def __init__(self, max_nodes=DEFAULT_VCF_NODES, time_budget_ms=None, max_entries=DEFAULT_VCF_ENTRIES):
+        # default per-call budgets and cache cap (entries)
+        self.max_nodes = max_nodes
+        self.time_budget_ms = time_budget_ms
+        self.max_entries = max_entries
+        self._cache = {}
+        self.nodes = 0
+        self.complete = True
+        self._node_limit = 0
+        self._deadline = None
+
+    def __len__(self):
+        return len(self._cache)
+
+    def clear(self):
+        # drop every cached result
+        self._cache.clear()
+
+    def solve(self, board, stone, max_nodes=None, time_budget_ms=None):
+        # winning sequence for stone to move, as a list of moves starting
+        # with stone's and alternating with the forced replies, ending on
+        # the five; None if there is none or the budget ran out (complete
+        # is False in that case)
+        self.nodes = 0
+        self.complete = True
+        if board.winner is not None:
+            return None
+
+        self._node_limit = self.max_nodes if max_nodes is None else max_nodes
+        budget = self.time_budget_ms if time_budget_ms is None else time_budget_ms
+        self._deadline = None if budget is None else time.perf_counter() + budget / 1000.0
+
+        defender = WHITE if stone == BLACK else BLACK
+        try:
+            sequence = self._attack(board, stone, defender)
+        except _Cutoff:
+            self.complete = False
+            return None
+        return None if sequence is None else [divmod(idx, board.size) for idx in sequence]
+
+    def _attack(self, board, attacker, defender, fours=None, block=None):
+        # cached search from an attacker-to-move position; sequences are
+        # tuples of flat indices. Below the root, fours (the attacker's four
+        # points) is passed down and block is the defender's last move
+        self.nodes += 1
+        if self.nodes > self._node_limit or (
+            self._deadline is not None and time.perf_counter() > self._deadline
+        ):
+            raise _Cutoff
+
+        key = (board.hash, attacker)
+        entry = self._cache.get(key)
+        if entry is not None and entry[0] == board.stone_count:
+            return entry[1]
+
+        result = self._search(board, attacker, defender, fours, block)
+
+        if len(self._cache) >= self.max_entries:
+            self._cache.clear()
+        self._cache[key] = (board.stone_count, result)
+        return result
+
+    def _search(self, board, attacker, defender, fours, block):
+        # try every four, most windows first, answering each with its block
+        if block is None:
+            fives = window_points(board, attacker, 4)
+            if fives:
+                return (min(fives),)
+            threats = window_points(board, defender, 4)
+            fours = window_points(board, attacker, 3)
+        else:
+            # below the root the attacker has no five (its one four was just
+            # blocked) and any defender five threat runs through the block
+            threats = five_points_through(board, block, defender)
+
+        # a defender five threat must be blocked, by a four of our own
+        if len(threats) > 1:
+            return None
+        moves = fours.most_common()
+        if threats:
+            moves = [(idx, n) for idx, n in moves if idx in threats]
+
+        size = board.size
+        through = line_tables(size).through
+        for idx, _ in moves:
+            lines = {line_id for line_id, _ in through[idx]}
+            before = _lines_points(board, lines, attacker, 3)
+            board.push(divmod(idx, size), attacker)
+            try:
+                wins = five_points_through(board, idx, attacker)
+                if len(wins) >= 2:
+                    # open or double four: either block loses to the other
+                    return (idx, wins[0], wins[1])
+
+                reply = wins[0]
+                extra = {line_id for line_id, _ in through[reply]} - lines
+                before.update(_lines_points(board, extra, attacker, 3))
+                board.push(divmod(reply, size), defender)
+                try:
+                    # four points move only on the lines through the two stones
+                    child = fours.copy()
+                    child.subtract(before)
+                    child.update(_lines_points(board, lines | extra, attacker, 3))
+                    rest = self._attack(board, attacker, defender, +child, reply)
+                finally:
+                    board.pop()
+                if rest is not None:
+                    return (idx, reply) + rest
+            finally:
+                board.pop()
+        return None
@@ -0,0 +1,244 @@
+import time
+from gomoku.board import BLACK, WHITE
+from heuristics.features import threat_moves
+from search.vcf import five_points_through, points_through, window_points
+
+# default limits for one solve() call and for the proof cache
+DEFAULT_VCT_NODES = 50000
+DEFAULT_VCT_ENTRIES = 1 << 16
+
+# initial proof number of a single three (a four has one forced reply, a
+# three several defences)
+THREE_PROOF = 2
+
+# threat_level_from_total tier of a double three
+DOUBLE_THREE_LEVEL = 3
+
+# proof/disproof number of a solved node
+_INF = 1 << 40
+
+
+class _Node:
+    # proof tree node; or_node is True when the attacker is to move, move
+    # is the move that led here and line, once proven, the winning moves
+    # from here
+    __slots__ = ("move", "or_node", "pn", "dn", "children", "line")
+
+    def __init__(self, move, or_node):
+        self.move = move
+        self.or_node = or_node
+        self.pn = 1
+        self.dn = 1
+        self.children = None
+        self.line = None
+
+    def prove(self, line):
+        self.pn, self.dn, self.line = 0, _INF, line
+        self.children = []
+
+    def disprove(self):
+        self.pn, self.dn = _INF, 0
+        self.children = []
+
+
+class VCTSolver:
+    # Proof-number search for victory by continuous threats: the attacker
+    # only plays moves that make a four or a three that can still become an
+    # open four (threat_moves, from the pattern definitions in
+    # heuristics.features); dead threes force nothing. The defender answers a
+    # four with its block, and a three with its gain and cost squares (the
+    # cells that would turn it into a four) or a four of its own. Defender
+    # five threats are handled as in VCFSolver.
+    # The tree is capped at max_nodes, and solved subtrees are cut back to
+    # the line that proves them. Solved attacker-to-move positions go into
+    # a proof cache keyed by (position hash, attacker), with the stone count
+    # as a collision check, kept across calls. Defender nodes are not cached
+    # because their replies depend on the threat just made.
+
+    def __init__(self, max_nodes=DEFAULT_VCT_NODES, time_budget_ms=None, max_entries=DEFAULT_VCT_ENTRIES):
+        # default per-call budgets and proof cache cap (entries)
+        self.max_nodes = max_nodes
+        self.time_budget_ms = time_budget_ms
+        self.max_entries = max_entries
+        self._cache = {}
+        self.nodes = 0
+        self.complete = True
+
+    def __len__(self):
+        return len(self._cache)
+
+    def clear(self):
+        # drop every cached proof and disproof
+        self._cache.clear()
+
+    def solve(self, board, stone, max_nodes=None, time_budget_ms=None):
+        # winning line for stone to move (stone's moves alternating with
+        # one defence each), or None if there is none or the budget ran out
+        # (complete is False in that case)
+        self.nodes = 1
+        self.complete = True
+        if board.winner is not None:
+            return None
+
+        node_limit = self.max_nodes if max_nodes is None else max_nodes
+        budget = self.time_budget_ms if time_budget_ms is None else time_budget_ms
+        deadline = None if budget is None else time.perf_counter() + budget / 1000.0
+
+        attacker = stone
+        defender = WHITE if stone == BLACK else BLACK
+        root = _Node(None, True)
+        while root.pn and root.dn:
+            if self.nodes >= node_limit or (deadline is not None and time.perf_counter() > deadline):
+                self.complete = False
+                return None
+
+            # descend to the most-proving node, playing the path
+            path = [root]
+            node = root
+            while node.children is not None and node.children:
+                node = self._most_proving(node)
+                board.push(node.move, defender if node.or_node else attacker)
+                path.append(node)
+
+            self._expand(board, node, attacker, defender)
+
+            # back up proof numbers, unwinding the path
+            for i in range(len(path) - 1, -1, -1):
+                node = path[i]
+                if node.children:
+                    self._update(node)
+                if node.or_node and (node.pn == 0 or node.dn == 0):
+                    self._store(board, attacker, node)
+                if i:
+                    board.pop()
+
+        return list(root.line) if root.pn == 0 else None
+
+    def _most_proving(self, node):
+        # child that decides the node soonest
+        if node.or_node:
+            return min(node.children, key=lambda c: c.pn)
+        return min(node.children, key=lambda c: c.dn)
+
+    def _update(self, node):
+        # recompute a node's numbers from its children, cutting a solved
+        # node back to the child that decides it
+        children = node.children
+        if node.or_node:
+            node.pn = min(c.pn for c in children)
+            node.dn = min(_INF, sum(c.dn for c in children))
+        else:
+            node.pn = min(_INF, sum(c.pn for c in children))
+            node.dn = min(c.dn for c in children)
+
+        if node.pn == 0:
+            best = children[0] if not node.or_node else min(children, key=lambda c: c.pn)
+            node.prove((best.move,) + best.line)
+        elif node.dn == 0:
+            node.disprove()
+
+    def _store(self, board, attacker, node):
+        # cache a solved attacker-to-move position
+        if len(self._cache) >= self.max_entries:
+            self._cache.clear()
+        self._cache[(board.hash, attacker)] = (board.stone_count, node.line)
+
+    def _new(self, move, or_node):
+        self.nodes += 1
+        return _Node(move, or_node)
+
+    def _expand(self, board, node, attacker, defender):
+        # create the node's children, or solve it outright
+        size = board.size
+        if node.or_node:
+            entry = self._cache.get((board.hash, attacker))
+            if entry is not None and entry[0] == board.stone_count:
+                if entry[1] is None:
+                    node.disprove()
+                else:
+                    node.prove(entry[1])
+                return
+
+            line, blocks = self._immediate(board, attacker, defender)
+            if line is not None:
+                node.prove(line)
+                return
+
+            # a defender five threat must be blocked, by a threat of our own
+            if len(blocks) > 1:
+                node.disprove()
+                return
+            threats = threat_moves(board, attacker, board.candidate_moves(radius=2))
+            if blocks:
+                block = divmod(min(blocks), size)
+                threats = {block: threats[block]} if block in threats else {}
+            if not threats:
+                node.disprove()
+                return
+
+            # strongest threats first; a single three leaves the defender
+            # several replies, so it starts with a higher proof number
+            moves = sorted(threats, key=lambda m: -threats[m])
+            node.children = [self._new(move, False) for move in moves]
+            for child in node.children:
+                if threats[child.move] < DOUBLE_THREE_LEVEL:
+                    child.pn = THREE_PROOF
+            return
+
+        if window_points(board, defender, 4):
+            # the threat left a defender five standing
+            node.disprove()
+            return
+
+        r, c = node.move
+        fives = window_points(board, attacker, 4)
+        if len(fives) > 1:
+            first, second = sorted(fives)[:2]
+            node.prove((divmod(first, size), divmod(second, size)))
+            return
+        if fives:
+            replies = [divmod(min(fives), size)]
+        else:
+            # gain and cost squares of the three, then counter-fours
+            replies = [divmod(i, size) for i in points_through(board, r * size + c, attacker, 3)]
+            replies += [
+                divmod(i, size) for i in window_points(board, defender, 3)
+                if divmod(i, size) not in replies
+            ]
+        if not replies:
+            node.disprove()
+            return
+
+        # replies that leave an immediate win are proven on the spot
+        node.children = []
+        for move in replies:
+            child = self._new(move, True)
+            board.push(move, defender)
+            try:
+                line, _ = self._immediate(board, attacker, defender)
+                if line is not None:
+                    child.prove(line)
+                    self._store(board, attacker, child)
+            finally:
+                board.pop()
+            node.children.append(child)
+
+    def _immediate(self, board, attacker, defender):
+        # (line, defender five points) for an attacker-to-move position; line
+        # is a win found without search: a five to complete or, when the
+        # defender has no five threat, an open or double four
+        size = board.size
+        fives = window_points(board, attacker, 4)
+        if fives:
+            return (divmod(min(fives), size),), fives
+        blocks = window_points(board, defender, 4)
+        if blocks:
+            return None, blocks
+        for idx in window_points(board, attacker, 3):
+            move = divmod(idx, size)
+            board.push(move, attacker)
+            wins = five_points_through(board, idx, attacker)
+            board.pop()
+            if len(wins) >= 2:
+                return (move, divmod(wins[0], size), divmod(wins[1], size)), blocks
+        return None, blocks
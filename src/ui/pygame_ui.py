@@ -81,9 +81,10 @@ class PygameUI:
 
     def _draw_pieces(self, screen, game, black_img, white_img):
         # Draw all placed stones
+        grid = game.board.grid
         for row in range(BOARD_SIZE):
             for col in range(BOARD_SIZE):
-                s = game.board.grid[row][col]
+                s = grid[row][col]
                 if s == BLACK:
                     rect = black_img.get_rect(center=self.cell_to_pixel((row, col)))
                     screen.blit(black_img, rect)
@@ -0,0 +1,41 @@
+import pytest
+
+from gomoku.board import Board, BLACK, WHITE
+from search.vcf import five_points_through
+
+
+@pytest.fixture
+def vcf_board():
+    # BLACK wins by (7,7) (7,8) (6,7) then a double four at (4,9)/(5,7)
+    b = Board(size=15)
+    for move in ((7, 4), (7, 5), (7, 6), (8, 7), (9, 7), (5, 8), (3, 10)):
+        b.place(move, BLACK)
+    for move in ((7, 3), (10, 7), (2, 11), (14, 0), (14, 14), (0, 14), (12, 2)):
+        b.place(move, WHITE)
+    return b
+
+
+def _assert_forced_win(board, stone, sequence):
+    # every attacker move but the last makes a four, every reply blocks it
+    other = WHITE if stone == BLACK else BLACK
+    pushed = 0
+    try:
+        for i, move in enumerate(sequence):
+            turn = stone if i % 2 == 0 else other
+            if turn == other:
+                idx = sequence[i - 1][0] * board.size + sequence[i - 1][1]
+                fives = five_points_through(board, idx, stone)
+                assert move[0] * board.size + move[1] in fives
+            assert board.push(move, turn)
+            pushed += 1
+        assert board.winner == stone
+    finally:
+        for _ in range(pushed):
+            board.pop()
+
+
+@pytest.fixture
+def assert_forced_win():
+    # Check a VCF line: each attacker four is answered by its block, and
+    # the last move wins
+    return _assert_forced_win
@@ -76,3 +76,192 @@ def test_copy_is_deep_and_preserves_last_move():
     assert b2.place((0, 0), WHITE)
     assert b2.grid[0][0] == WHITE
     assert b.grid[0][0] == EMPTY
+
+
+def test_push_pop_restores_grid_last_move_and_winner():
+    # pop should undo push exactly, including the cached winner
+    b = Board()
+    for col in range(4):
+        assert b.push((7, col), BLACK)
+    before = b.grid
+
+    assert b.push((7, 4), BLACK)
+    assert b.winner == BLACK
+    assert b.pop() == (7, 4)
+
+    assert b.grid == before
+    assert b.last_move == (7, 3)
+    assert b.winner is None
+
+
+def test_push_rejects_illegal_moves():
+    # push should refuse occupied cells without recording history
+    b = Board()
+    assert b.push((0, 0), WHITE)
+    assert b.push((0, 0), BLACK) is False
+    assert b.pop() == (0, 0)
+    assert b.last_move is None
+    assert b.is_empty((0, 0))
+
+
+def test_would_win_matches_push_without_mutating():
+    # would_win should predict a push's winner and leave the board untouched
+    import random
+
+    rng = random.Random(8)
+    b = Board(size=9)
+    stone = BLACK
+    for _ in range(30):
+        before = (b.grid, b.hash)
+        for move in b.candidate_moves():
+            for s in (BLACK, WHITE):
+                predicted = b.would_win(move, s)
+                assert (b.grid, b.hash) == before
+                b.push(move, s)
+                assert predicted == (b.winner == s)
+                b.pop()
+        b.push(rng.choice(b.candidate_moves(radius=1)), stone)
+        if b.winner is not None:
+            break
+        stone = WHITE if stone == BLACK else BLACK
+
+
+def test_zobrist_hash_is_incremental_and_order_independent():
+    # Same position via different move orders hashes equal; pop restores the hash
+    a = Board()
+    a.place((7, 7), BLACK)
+    a.place((7, 8), WHITE)
+    a.place((8, 8), BLACK)
+
+    b = Board()
+    b.place((8, 8), BLACK)
+    b.place((7, 8), WHITE)
+    b.place((7, 7), BLACK)
+
+    assert a.hash == b.hash != 0
+    assert a.copy().hash == a.hash
+
+    h = a.hash
+    a.push((0, 0), WHITE)
+    assert a.hash != h
+    a.pop()
+    assert a.hash == h
+
+    # colour matters
+    c = Board()
+    c.place((7, 7), WHITE)
+    assert c.hash != Board().hash
+    d = Board()
+    d.place((7, 7), BLACK)
+    assert c.hash != d.hash
+
+
+def test_candidate_moves_frontier_matches_full_scan():
+    # Maintained frontier should equal a full neighbourhood scan through push/pop
+    import random
+
+    rng = random.Random(0)
+    b = Board(size=9)
+    assert b.candidate_moves() == [(4, 4)]
+
+    stone = BLACK
+    for _ in range(30):
+        move = rng.choice(b.legal_moves())
+        b.push(move, stone)
+        stone = WHITE if stone == BLACK else BLACK
+        for radius in (1, 2):
+            assert b.candidate_moves(radius) == b._scan_candidate_moves(radius)
+
+    for _ in range(30):
+        b.pop()
+        for radius in (1, 2):
+            assert b.candidate_moves(radius) == b._scan_candidate_moves(radius)
+    assert b.candidate_moves() == [(4, 4)]
+
+    b.place((0, 0), BLACK)
+    c = b.copy()
+    c.place((0, 1), WHITE)
+    assert (0, 3) in c.candidate_moves(2)
+    assert (0, 3) not in b.candidate_moves(2)
+    assert b.candidate_moves(3) == b._scan_candidate_moves(3)
+
+
+def test_grid_snapshot_cached_until_mutation_and_cells_view():
+    # grid is reused between mutations; cells is a read-only flat view
+    b = Board()
+    g = b.grid
+    assert b.grid is g
+
+    v = b.version
+    b.push((2, 3), WHITE)
+    assert b.version != v
+    assert b.grid is not g
+    assert b.grid[2][3] == WHITE
+
+    cells = b.cells
+    assert len(cells) == BOARD_SIZE * BOARD_SIZE
+    assert cells[2 * BOARD_SIZE + 3] == 2
+    assert cells.readonly
+
+    b.pop()
+    assert cells[2 * BOARD_SIZE + 3] == 0
+    assert b.grid == g
+
+
+def test_packed_bytes_and_base64_round_trip():
+    # 2-bit packing should round-trip stones, size and hash
+    b = Board(size=9)
+    for move, stone in (((0, 0), BLACK), ((4, 4), WHITE), ((8, 8), BLACK), ((3, 7), WHITE)):
+        b.place(move, stone)
+
+    data = b.to_bytes()
+    assert len(data) == 1 + (9 * 9 + 3) // 4
+    c = Board.from_bytes(data)
+    assert isinstance(c, Board)
+    assert c.size == 9 and c.grid == b.grid and c.hash == b.hash
+    assert c.last_move is None
+
+    text = b.to_base64()
+    assert "=" not in text
+    assert Board.from_base64(text).grid == b.grid
+
+
+def test_packed_rejects_malformed_input():
+    # Bad lengths, cell codes and base64 text raise ValueError
+    import pytest
+
+    with pytest.raises(ValueError):
+        Board.from_bytes(b"")
+    with pytest.raises(ValueError):
+        Board.from_bytes(bytes([15, 0, 0]))
+    with pytest.raises(ValueError):
+        Board.from_bytes(bytes([2, 0b11]))
+    with pytest.raises(ValueError):
+        Board.from_base64("not base64!")
+
+
+def test_packed_checks_size_and_padding_before_building():
+    # A wrong-size or oversize packed board is rejected before any per-size
+    # table is built, and non-zero padding bits are not accepted
+    import base64
+    import pytest
+    from gomoku import board as board_module
+
+    big = bytes([250]) + bytes((250 * 250 + 3) // 4)
+    with pytest.raises(ValueError):
+        Board.from_bytes(big, expected_size=BOARD_SIZE)
+    text = base64.urlsafe_b64encode(big).rstrip(b"=").decode("ascii")
+    with pytest.raises(ValueError):
+        Board.from_base64(text, expected_size=BOARD_SIZE)
+    assert 250 not in board_module._ZOBRIST
+    assert 250 not in board_module._COORDS
+
+    with pytest.raises(ValueError):
+        Board.from_bytes(Board(size=9).to_bytes(), expected_size=BOARD_SIZE)
+    assert Board.from_bytes(Board().to_bytes(), expected_size=BOARD_SIZE).size == BOARD_SIZE
+
+    # 9 * 9 = 81 cells leave three unused cell slots in the last byte
+    data = bytearray(Board(size=9).to_bytes())
+    data[-1] |= 0b100
+    with pytest.raises(ValueError):
+        Board.from_bytes(bytes(data))
@@ -0,0 +1,55 @@
+import random
+
+from gomoku.board import Board, BLACK, WHITE
+from heuristics.cache import ENTRY_BYTES, FeatureCache
+from heuristics.evaluate import compile_weights, evaluate, order_moves
+from heuristics.features import extract_features
+
+
+def _random_board(seed, size=9, stones=14):
+    rng = random.Random(seed)
+    b = Board(size=size)
+    stone = BLACK
+    for _ in range(stones):
+        b.place(rng.choice(b.candidate_moves(radius=1)), stone)
+        stone = WHITE if stone == BLACK else BLACK
+    return b, stone
+
+
+def test_cache_counts_hits_and_misses():
+    b, stone = _random_board(1)
+    cache = FeatureCache()
+    assert cache.features(b, stone) == extract_features(b, stone)
+    assert cache.features(b, stone) == extract_features(b, stone)
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    b.push(b.candidate_moves()[0], stone)
+    cache.features(b, stone)
+    assert cache.misses == 2
+    b.pop()
+    cache.features(b, stone)
+    assert cache.hits == 2
+
+
+def test_cache_respects_memory_cap():
+    cache = FeatureCache(max_bytes=3 * ENTRY_BYTES)
+    assert cache.max_entries == 3
+    b, stone = _random_board(2)
+    for move in b.candidate_moves()[:6]:
+        b.push(move, stone)
+        cache.values(b, stone)
+        b.pop()
+    assert len(cache) == 3
+
+
+def test_cached_evaluate_and_ordering_match_uncached():
+    cache = FeatureCache()
+    w = compile_weights({"my_live_two": 123.0})
+    for seed in range(4):
+        b, stone = _random_board(seed + 10)
+        for s in (BLACK, WHITE):
+            assert evaluate(b, s, w, cache=cache) == evaluate(b, s, w)
+            assert evaluate(b, s, w, cache=cache) == evaluate(b, s, w)
+        moves = b.candidate_moves()
+        assert order_moves(b, moves, stone, w, cache=cache) == order_moves(b, moves, stone, w)
+    assert cache.hits > 0
@@ -0,0 +1,533 @@
+import random
+
+from gomoku.board import Board, BLACK, WHITE, EMPTY
+from heuristics.features import (
+    _collect_patterns,
+    _count_line_patterns,
+    _iter_lines,
+    extract_features,
+)
+
+
+def _reference_count_line_patterns(line, stone):
+    # original slice-and-compare implementation, kept as the parity reference
+    n = len(line)
+
+    live_two = 0
+    blocked_two = 0
+    live_three = 0
+    blocked_three = 0
+    live_four = 0
+    blocked_four = 0
+    jump_two = 0
+    blocked_jump_two = 0
+    jump_three = 0
+    blocked_jump_three = 0
+    jump_four = 0
+    blocked_jump_four = 0
+
+    i = 0
+    while i < n:
+        if line[i] != stone:
+            i += 1
+            continue
+
+        j = i
+        while j < n and line[j] == stone:
+            j += 1
+
+        run_len = j - i
+
+        # check openness of ends
+        left_open = (i - 1 >= 0 and line[i - 1] == EMPTY)
+        right_open = (j < n and line[j] == EMPTY)
+
+        if run_len == 2:
+            if left_open and right_open:
+                live_two += 1
+            elif left_open or right_open:
+                blocked_two += 1
+
+        elif run_len == 3:
+            if left_open and right_open:
+                live_three += 1
+            elif left_open or right_open:
+                blocked_three += 1
+
+        elif run_len == 4:
+            if left_open and right_open:
+                live_four += 1
+            elif left_open or right_open:
+                blocked_four += 1
+
+        i = j
+    
+    # open jump two patterns
+    open_jump_two_patterns = [
+        [EMPTY, stone, EMPTY, stone, EMPTY],
+    ]
+
+    # blocked jump two patterns
+    blocked_jump_two_patterns = [
+        [stone, EMPTY, stone, EMPTY],
+        [EMPTY, stone, EMPTY, stone],
+    ]
+
+    # open jump two
+    for i in range(n - 4):
+        if line[i:i + 5] in open_jump_two_patterns:
+            jump_two += 1
+
+    # blocked jump two
+    for i in range(n - 3):
+        if line[i:i + 4] in blocked_jump_two_patterns:
+            blocked_jump_two += 1
+
+    # open jump three patterns
+    open_jump_three_patterns = [
+        [EMPTY, stone, stone, EMPTY, stone, EMPTY],
+        [EMPTY, stone, EMPTY, stone, stone, EMPTY],
+    ]
+
+    for i in range(n - 5):
+        if line[i:i + 6] in open_jump_three_patterns:
+            jump_three += 1
+
+    # blocked jump three patterns
+    blocked_jump_three_patterns = [
+        [stone, stone, EMPTY, stone, EMPTY],
+        [stone, EMPTY, stone, stone, EMPTY],
+        [EMPTY, stone, stone, EMPTY, stone],
+        [EMPTY, stone, EMPTY, stone, stone],
+    ]
+
+    for i in range(n - 4):
+        if line[i:i + 5] in blocked_jump_three_patterns:
+            blocked_jump_three += 1
+
+    # open jump four patterns
+    open_jump_four_patterns = [
+        [EMPTY, stone, stone, stone, EMPTY, stone, EMPTY],
+        [EMPTY, stone, stone, EMPTY, stone, stone, EMPTY],
+        [EMPTY, stone, EMPTY, stone, stone, stone, EMPTY],
+    ]
+
+    for i in range(n - 6):
+        if line[i:i + 7] in open_jump_four_patterns:
+            jump_four += 1
+
+    # blocked jump four patterns
+    blocked_jump_four_patterns = [
+        [stone, stone, stone, EMPTY, stone, EMPTY],
+        [stone, stone, EMPTY, stone, stone, EMPTY],
+        [stone, EMPTY, stone, stone, stone, EMPTY],
+        [EMPTY, stone, stone, stone, EMPTY, stone],
+        [EMPTY, stone, stone, EMPTY, stone, stone],
+        [EMPTY, stone, EMPTY, stone, stone, stone],
+    ]
+
+    for i in range(n - 5):
+        if line[i:i + 6] in blocked_jump_four_patterns:
+            blocked_jump_four += 1
+
+    return {
+        "live_two": live_two,
+        "blocked_two": blocked_two,
+        "live_three": live_three,
+        "blocked_three": blocked_three,
+        "live_four": live_four,
+        "blocked_four": blocked_four,
+        "jump_two": jump_two,
+        "blocked_jump_two": blocked_jump_two,
+        "jump_three": jump_three,
+        "blocked_jump_three": blocked_jump_three,
+        "jump_four": jump_four,
+        "blocked_jump_four": blocked_jump_four,
+    }
+
+
+def _reference_level_from_feats(feats, prefix):
+    # original feature-dict threat level, kept as the threat_level reference
+    if feats[f"{prefix}_live_four"] > 0.0:
+        return 6
+    for k in ("double_blocked_four", "blocked4_and_live3", "blocked4_and_jump4", "double_jump_four"):
+        if feats[f"{prefix}_{k}"] > 0.0:
+            return 5
+    for k in ("jump_four", "blocked_four"):
+        if feats[f"{prefix}_{k}"] > 0.0:
+            return 4
+    for k in ("double_live_three", "jump3_and_live3", "double_jump_three"):
+        if feats[f"{prefix}_{k}"] > 0.0:
+            return 3
+    for k in ("live_three", "jump_three"):
+        if feats[f"{prefix}_{k}"] > 0.0:
+            return 2
+    for k in ("live_two", "jump_two"):
+        if feats[f"{prefix}_{k}"] > 0.0:
+            return 1
+    return 0
+
+
+def _random_grid(rng, size):
+    # random position, including overlines and crowded lines
+    fill = rng.random()
+    return tuple(
+        tuple(rng.choice((BLACK, WHITE)) if rng.random() < fill else EMPTY for _ in range(size))
+        for _ in range(size)
+    )
+
+
+def test_line_counts_match_reference_on_random_lines():
+    # lookup-table counts should equal the slice-based counts for every line
+    rng = random.Random(11)
+    for _ in range(3000):
+        n = rng.randint(1, 15)
+        p = rng.random()
+        line = [rng.choice((BLACK, WHITE)) if rng.random() < p else EMPTY for _ in range(n)]
+        for stone in (BLACK, WHITE):
+            assert _count_line_patterns(line, stone) == _reference_count_line_patterns(line, stone)
+
+
+def test_collect_patterns_match_reference_on_random_boards():
+    # board totals should equal summing reference counts over every line
+    rng = random.Random(12)
+    for size in (9, 15):
+        for _ in range(30):
+            grid = _random_grid(rng, size)
+            for stone in (BLACK, WHITE):
+                expected = {}
+                for line in _iter_lines(grid):
+                    for k, v in _reference_count_line_patterns(line, stone).items():
+                        expected[k] = expected.get(k, 0) + v
+                assert _collect_patterns(grid)[stone] == expected
+
+
+def test_extract_features_symmetric_between_colours():
+    # my/opp features should swap when the perspective flips
+    rng = random.Random(13)
+    b = Board()
+    for _ in range(40):
+        b.place(rng.choice(b.legal_moves()), rng.choice((BLACK, WHITE)))
+    mine = extract_features(b, BLACK)
+    theirs = extract_features(b, WHITE)
+    for k, v in mine.items():
+        if k.startswith("my_"):
+            assert theirs["opp_" + k[3:]] == v
+
+
+def test_accumulator_tracks_push_pop_and_copy():
+    # incremental totals should always equal a full rescan of the grid
+    from heuristics.features import feature_accumulator, _unpack_counts
+
+    rng = random.Random(14)
+    b = Board(size=9)
+    b.place((4, 4), BLACK)
+    acc = feature_accumulator(b)
+    assert feature_accumulator(b) is acc
+
+    def check(board):
+        total = feature_accumulator(board).total
+        for stone in (BLACK, WHITE):
+            assert _unpack_counts(total, stone) == _collect_patterns(board.grid)[stone]
+
+    stone = WHITE
+    for _ in range(40):
+        b.push(rng.choice(b.legal_moves()), stone)
+        stone = BLACK if stone == WHITE else WHITE
+        check(b)
+
+    c = b.copy()
+    assert feature_accumulator(c) is not acc
+    c.push(c.legal_moves()[0], stone)
+    check(c)
+    check(b)
+
+    for _ in range(41):
+        b.pop()
+        check(b)
+
+
+def test_cached_feature_views_follow_push_pop():
+    # cached perspectives must match a freshly built board after every change
+    rng = random.Random(21)
+    b = Board(size=9)
+    stone = BLACK
+    for _ in range(30):
+        b.push(rng.choice(b.legal_moves()), stone)
+        stone = BLACK if stone == WHITE else WHITE
+
+        fresh = Board(size=9)
+        for r, row in enumerate(b.grid):
+            for c, v in enumerate(row):
+                if v != EMPTY:
+                    fresh.place((r, c), v)
+
+        for s in (BLACK, WHITE):
+            feats = extract_features(b, s)
+            feats["my_stones"] = -1.0  # callers may mutate the returned dict
+            assert extract_features(b, s) == extract_features(fresh, s)
+
+
+def test_score_move_deltas_match_push_pop():
+    # line-local scoring should agree with placing each move and re-extracting
+    from heuristics.evaluate import evaluate, score_move_deltas
+
+    rng = random.Random(5)
+    for _ in range(6):
+        b = Board(size=9)
+        stone = BLACK
+        for _ in range(rng.randint(4, 18)):
+            b.push(rng.choice(b.candidate_moves(radius=1)), stone)
+            if b.winner is not None:
+                b.pop()
+                break
+            stone = BLACK if stone == WHITE else WHITE
+
+        opp = WHITE if stone == BLACK else BLACK
+        before = extract_features(b, stone)
+        before_eval = evaluate(b, stone)
+        for item in score_move_deltas(b, stone, b.candidate_moves()):
+            b.push(item["move"], stone)
+            after = extract_features(b, stone)
+            after_opp = extract_features(b, opp)
+            assert item["delta"] == evaluate(b, stone) - before_eval
+            b.pop()
+            for k, v in item["deltas"].items():
+                assert v == after[k] - before[k]
+            drop = _reference_level_from_feats(before, "opp") - _reference_level_from_feats(after_opp, "my")
+            assert item["threat_drop"] == drop
+
+
+def test_threat_index_matches_two_ply_brute_force():
+    # threat-point sets from the index should equal placing both moves
+    from heuristics.evaluate import (
+        _opp_next_three_to_threat_points,
+        _opp_threat_index,
+        _opp_threat_points,
+    )
+
+    four_keys = (
+        "live_four", "double_blocked_four", "blocked4_and_jump4", "double_jump_four",
+        "blocked4_and_live3", "blocked4_and_jump3", "jump4_and_live3", "jump4_and_jump3",
+    )
+    three_keys = ("double_live_three", "jump3_and_live3", "double_jump_three")
+
+    def has(feats, keys):
+        return any(feats[f"my_{k}"] > 0.0 for k in keys)
+
+    rng = random.Random(33)
+    for _ in range(6):
+        b = Board(size=9)
+        stone = BLACK
+        for _ in range(rng.randint(0, 16)):
+            b.push(rng.choice(b.candidate_moves(radius=1)), stone)
+            if b.winner is not None:
+                b.pop()
+                break
+            stone = BLACK if stone == WHITE else WHITE
+        opp = WHITE if stone == BLACK else BLACK
+
+        three_pts, four_pts, to_threat = set(), set(), set()
+        for m1 in b.candidate_moves(radius=2):
+            b.push(m1, opp)
+            feats = extract_features(b, opp)
+            if has(feats, four_keys):
+                four_pts.add(m1)
+            if has(feats, three_keys):
+                three_pts.add(m1)
+            if feats["my_live_three"] > 0.0 or feats["my_jump_three"] > 0.0:
+                for m2 in b.candidate_moves(radius=2):
+                    b.push(m2, opp)
+                    after = extract_features(b, opp)
+                    b.pop()
+                    if has(after, four_keys) or has(after, three_keys):
+                        to_threat.add(m1)
+                        break
+            b.pop()
+
+        flags = _opp_threat_index(b, stone, b.candidate_moves(radius=2))
+        assert _opp_threat_points(flags) == (three_pts, four_pts)
+        assert _opp_next_three_to_threat_points(b, stone, flags) == to_threat
+
+
+def test_batch_features_match_extract_features():
+    # the numpy batch path should reproduce extract_features exactly
+    import pytest
+
+    np = pytest.importorskip("numpy")
+    from heuristics.features import FEATURE_NAMES, extract_features_batch
+
+    rng = random.Random(17)
+    for size in (7, 9, 15):
+        boards, stones = [], []
+        for _ in range(12):
+            b = Board(size=size)
+            stone = BLACK
+            for _ in range(rng.randint(0, size * 2)):
+                b.push(rng.choice(b.legal_moves()), stone)
+                stone = BLACK if stone == WHITE else WHITE
+            boards.append(b)
+            stones.append(rng.choice((BLACK, WHITE)))
+
+        matrix = extract_features_batch(boards, stones)
+        assert matrix.shape == (len(boards), len(FEATURE_NAMES))
+        for row, b, s in zip(matrix, boards, stones):
+            feats = extract_features(b, s)
+            assert row.tolist() == [feats[k] for k in FEATURE_NAMES]
+
+        cells = np.stack([np.frombuffer(b.cells, dtype=np.int8).reshape(size, size) for b in boards])
+        assert (extract_features_batch(cells, BLACK, chunk=5)[:, 0] == [
+            extract_features(b, BLACK)["my_stones"] for b in boards
+        ]).all()
+
+
+def test_extract_features_batch_empty_and_bad_stones():
+    # no boards gives an empty matrix; stones are checked either way
+    import pytest
+
+    np = pytest.importorskip("numpy")
+    from heuristics.features import FEATURE_NAMES, extract_features_batch
+
+    assert extract_features_batch([], BLACK).shape == (0, len(FEATURE_NAMES))
+    assert extract_features_batch([], []).shape == (0, len(FEATURE_NAMES))
+    empty = np.zeros((0, 9, 9), dtype=np.int8)
+    assert extract_features_batch(empty, WHITE).shape == (0, len(FEATURE_NAMES))
+
+    for boards in ([], [Board(size=9)]):
+        with pytest.raises(ValueError):
+            extract_features_batch(boards, "?")
+        with pytest.raises(ValueError):
+            extract_features_batch(boards, [BLACK, WHITE])
+
+
+def test_threat_level_matches_feature_tiers():
+    # early-exit scanner should agree with the feature-dict tiers
+    from heuristics.features import threat_level
+
+    rng = random.Random(29)
+    seen = set()
+    for _ in range(40):
+        b = Board(size=9)
+        stone = BLACK
+        for _ in range(rng.randint(0, 30)):
+            b.push(rng.choice(b.legal_moves()), stone)
+            stone = BLACK if stone == WHITE else WHITE
+            for s in (BLACK, WHITE):
+                level = threat_level(b, s)
+                assert level == _reference_level_from_feats(extract_features(b, s), "my")
+                seen.add(level)
+    assert seen == set(range(7))
+
+
+def test_lazy_ordering_survives_search_between_yields():
+    # the generator must yield order_moves' sequence even when the caller
+    # searches (push/pop) below each move before asking for the next one
+    from heuristics.evaluate import order_moves, order_moves_lazy
+
+    rng = random.Random(41)
+    for _ in range(5):
+        b = Board(size=9)
+        stone = BLACK
+        for _ in range(rng.randint(2, 18)):
+            b.push(rng.choice(b.candidate_moves(radius=1)), stone)
+            if b.winner is not None:
+                b.pop()
+                break
+            stone = BLACK if stone == WHITE else WHITE
+        opp = WHITE if stone == BLACK else BLACK
+
+        expected = order_moves(b, b.candidate_moves(), stone)
+        seen = []
+        for move in order_moves_lazy(b, b.candidate_moves(), stone):
+            seen.append(move)
+            b.push(move, stone)
+            reply = b.candidate_moves()[0]
+            b.push(reply, opp)
+            extract_features(b, stone)
+            b.pop()
+            b.pop()
+        assert seen == expected
+
+
+def _line_open_four(board, move, stone):
+    # brute force: after stone on move, some empty cell on a line through
+    # it leaves two cells there that would each complete five
+    n = board.size
+    r, c = move
+    for dr, dc in ((0, 1), (1, 0), (1, 1), (1, -1)):
+        line = [(r + k * dr, c + k * dc) for k in range(-n, n + 1)]
+        line = [(i, j) for i, j in line if 0 <= i < n and 0 <= j < n]
+        empty = [m for m in line if m != move and board.grid[m[0]][m[1]] == EMPTY]
+        for gain in empty:
+            wins = 0
+            for point in empty:
+                if point == gain:
+                    continue
+                own = {move, gain, point}
+                run = 0
+                for m in line:
+                    run = run + 1 if m in own or board.grid[m[0]][m[1]] == stone else 0
+                    if run >= 5:
+                        wins += 1
+                        break
+            if wins >= 2:
+                return True
+    return False
+
+
+def test_threat_moves_match_push_pop():
+    # moves reported by threat_moves are exactly those that raise a four
+    # count, or a three count with a three that can still become an open
+    # four, with the threat level of the position after them
+    from heuristics.features import threat_level, threat_moves
+
+    fours = ("my_live_four", "my_blocked_four", "my_jump_four", "my_blocked_jump_four")
+    threes = ("my_live_three", "my_jump_three")
+    rng = random.Random(31)
+    for _ in range(20):
+        b = Board(size=9)
+        stone = BLACK
+        for _ in range(rng.randint(2, 24)):
+            b.push(rng.choice(b.legal_moves()), stone)
+            stone = BLACK if stone == WHITE else WHITE
+        if b.winner is not None:
+            continue
+        for s in (BLACK, WHITE):
+            moves = b.candidate_moves(radius=2)
+            threats = threat_moves(b, s, moves)
+            before = extract_features(b, s)
+            for move in moves:
+                open_four = _line_open_four(b, move, s)
+                b.push(move, s)
+                after = extract_features(b, s)
+                level = threat_level(b, s)
+                b.pop()
+                raised = any(after[k] > before[k] for k in fours) or (
+                    any(after[k] > before[k] for k in threes) and open_four
+                )
+                assert (move in threats) == raised
+                if raised:
+                    assert threats[move] == level
+
+
+def test_threat_moves_skip_dead_threes():
+    # O . X X X . O and an edge-blocked three only make fours with a
+    # single five point, so they are not threats
+    from heuristics.features import threat_moves
+
+    b = Board(size=15)
+    for move in ((0, 1), (0, 2)):
+        b.place(move, BLACK)
+    b.place((0, 5), WHITE)
+    assert threat_moves(b, BLACK, [(0, 3)]) == {}
+
+    b = Board(size=15)
+    for move in ((7, 4), (7, 5)):
+        b.place(move, BLACK)
+    for move in ((7, 2), (7, 8)):
+        b.place(move, WHITE)
+    assert threat_moves(b, BLACK, [(7, 6)]) == {}
+
+    # the same three with room on one side is still a threat
+    b.pop()
+    assert (7, 6) in threat_moves(b, BLACK, [(7, 6)])
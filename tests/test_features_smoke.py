@@ -10,3 +10,37 @@ def test_features_and_evaluate_importable_and_return_types():
     assert isinstance(feats, dict)
     s = evaluate(b, BLACK, weights={"my_stones": 1.0})
     assert isinstance(s, float)
+
+
+def test_feature_vector_follows_schema():
+    from array import array
+    from heuristics.features import FEATURE_NAMES, extract_features_vector
+
+    b = Board(size=9)
+    b.place((4, 4), BLACK)
+    b.place((4, 5), "O")
+    b.place((3, 3), BLACK)
+    for stone in (BLACK, "O"):
+        feats = extract_features(b, stone)
+        vec = extract_features_vector(b, stone)
+        assert tuple(feats) == FEATURE_NAMES
+        assert isinstance(vec, array)
+        assert list(vec) == [feats[k] for k in FEATURE_NAMES]
+
+
+def test_compiled_weights_match_dict_sum():
+    from heuristics.evaluate import DEFAULT_WEIGHTS, compile_weights
+
+    b = Board(size=9)
+    for move, stone in (((4, 4), BLACK), ((4, 5), "O"), ((3, 3), BLACK), ((5, 5), BLACK)):
+        b.place(move, stone)
+
+    custom = {"my_stones": 3.0, "opp_live_two": -7.5, "bias": 100.0}
+    for weights in (None, custom):
+        w = dict(DEFAULT_WEIGHTS)
+        w.update(weights or {})
+        for stone in (BLACK, "O"):
+            feats = extract_features(b, stone)
+            expected = float(sum(float(w.get(k, 0.0)) * float(v) for k, v in feats.items()))
+            assert evaluate(b, stone, weights) == expected
+            assert evaluate(b, stone, compile_weights(weights)) == expected
@@ -1,4 +1,6 @@
-from gomoku.board import Board, BLACK, WHITE
+import pytest
+
+from gomoku.board import Board, BLACK, WHITE, BOARD_SIZE
 from gomoku import rules
 
 
@@ -75,3 +77,100 @@ def test_is_terminal_true_when_winner():
         assert b.place((0, i), BLACK)
     assert rules.is_terminal(b.grid) is True
     assert rules.is_draw(b.grid) is False
+
+
+def test_board_winner_matches_full_scan_on_random_games():
+    # Winner cached on place should agree with a full-grid scan after every move
+    import random
+
+    rng = random.Random(1)
+    for _ in range(20):
+        b = Board(size=9)
+        stone = BLACK
+        moves = b.legal_moves()
+        rng.shuffle(moves)
+        for move in moves:
+            assert b.place(move, stone)
+            assert rules.winner(b) == rules.winner(b.grid)
+            if b.winner is not None:
+                break
+            stone = WHITE if stone == BLACK else BLACK
+        assert rules.is_terminal(b) == rules.is_terminal(b.grid)
+
+
+def test_board_winner_six_in_a_row_and_copy():
+    # Overlines count as wins and the cached winner survives copy
+    b = Board()
+    for col in (0, 1, 2, 4, 5):
+        assert b.place((3, col), WHITE)
+    assert b.winner is None
+    assert b.place((3, 3), WHITE)
+    assert b.winner == WHITE
+    assert rules.winner(b.copy()) == WHITE
+
+
+def test_status_reports_winner_draw_and_ongoing():
+    # status should agree for boards and raw grids in every outcome
+    b = Board(size=2)
+    assert rules.status(b) == rules.ONGOING
+    for move, stone in (((0, 0), BLACK), ((0, 1), WHITE), ((1, 0), WHITE), ((1, 1), BLACK)):
+        b.place(move, stone)
+    assert b.empty_count == 0
+    assert rules.status(b) == rules.DRAW
+    assert rules.status(b.grid) == rules.DRAW
+
+    b = Board()
+    for col in range(5):
+        b.place((2, col), WHITE)
+    assert rules.status(b) == WHITE
+    assert rules.status(b.grid) == WHITE
+    b.pop()
+    assert rules.status(b) == rules.ONGOING
+    assert b.empty_count == BOARD_SIZE * BOARD_SIZE - 4
+
+
+def test_line_tables_cover_every_line_once():
+    # Each cell lies on one row and one column, plus diagonals of length >= 2
+    from gomoku.lines import line_tables
+
+    for size in (9, 15):
+        tables = line_tables(size)
+        assert tables is line_tables(size)
+        assert len(tables.lines) == 2 * size + 2 * (2 * size - 3)
+        assert all(len(tables.lines[i]) >= 5 for i in tables.win_lines)
+        assert len(tables.through[0]) == 3  # corner: row, column, one diagonal
+        assert len(tables.through[size + 1]) == 4
+
+
+def test_winner_batch_matches_winner():
+    # Batched detection must agree with winner() on every board, including
+    # boards where both colours have five
+    import random
+
+    np = pytest.importorskip("numpy")
+    from gomoku.board import CELL_CODES
+
+    rng = random.Random(7)
+    for size in (9, 15):
+        grids = []
+        for _ in range(200):
+            fill = rng.random()
+            grids.append([
+                [rng.choice((BLACK, WHITE)) if rng.random() < fill else " " for _ in range(size)]
+                for _ in range(size)
+            ])
+        arr = np.array(
+            [[[CELL_CODES[v] for v in row] for row in g] for g in grids],
+            dtype=np.int8,
+        )
+        assert rules.winner_batch(arr) == [rules.winner(g) for g in grids]
+
+
+def test_winner_batch_accepts_boards():
+    # Boards are stacked through their flat cell view
+    pytest.importorskip("numpy")
+    b = Board()
+    for i in range(5):
+        b.place((i, 4 - i), WHITE)
+    assert rules.winner_batch([b, Board()]) == [WHITE, None]
+    assert rules.winner_batch([]) == []
@@ -0,0 +1,124 @@
+from gomoku.board import Board, BLACK, WHITE
+from gomoku import rules
+
+from agents.ab_agent import AlphaBetaAgent
+from agents.transposition import EXACT, LOWER, UPPER, TranspositionTable
+from heuristics.evaluate import evaluate
+
+
+def test_store_probe_and_collision_check():
+    tt = TranspositionTable(entries=100)
+    assert tt.capacity == 128
+    tt.new_search()
+    tt.store(12345, BLACK, 3, 2, LOWER, 1.5, (1, 2))
+    assert tt.probe(12345, BLACK, 3) == (2, LOWER, 1.5, (1, 2))
+    assert tt.probe(12345, WHITE, 3) is None
+    assert tt.probe(12345, BLACK, 4) is None
+    assert len(tt) == 1
+
+
+def test_replacement_prefers_depth_then_ages_out():
+    tt = TranspositionTable(entries=1)
+    tt.new_search()
+    tt.store(1, BLACK, 0, 5, EXACT, 1.0, (0, 0))
+    tt.store(2, BLACK, 0, 3, EXACT, 2.0, (0, 1))
+    assert tt.probe(1, BLACK, 0) is not None  # shallower entry rejected
+    tt.store(1, BLACK, 0, 1, UPPER, 0.5, (0, 2))
+    assert tt.probe(1, BLACK, 0) == (1, UPPER, 0.5, (0, 2))  # same position
+    tt.store(2, BLACK, 0, 1, EXACT, 2.0, (0, 1))
+    assert tt.probe(2, BLACK, 0) is not None  # equal depth replaces
+
+    tt.new_search()
+    tt.store(3, BLACK, 0, 0, EXACT, 3.0, None)
+    assert tt.probe(3, BLACK, 0) is not None  # older generation replaced
+    assert len(tt) == 1
+
+
+def _minimax(board, root, turn, depth):
+    # plain minimax over the same candidates and evaluation
+    if depth == 0 or rules.status(board) != rules.ONGOING:
+        return evaluate(board, root)
+    other = WHITE if turn == BLACK else BLACK
+    values = []
+    for move in board.candidate_moves():
+        board.push(move, turn)
+        values.append(_minimax(board, root, other, depth - 1))
+        board.pop()
+    return max(values) if turn == root else min(values)
+
+
+def test_search_value_matches_minimax_with_bounds():
+    b = Board(size=7)
+    for move, stone in (((3, 3), BLACK), ((3, 4), WHITE), ((2, 2), BLACK), ((4, 4), WHITE)):
+        b.place(move, stone)
+
+    moves = b.candidate_moves()
+    expected = [max(_minimax_after(b, move, depth) for move in moves) for depth in (1, 2, 3)]
+    for full_order_plies in (0, 2):
+        # cheap (killer/history) ordering must not change the value
+        agent = AlphaBetaAgent(
+            max_depth=3, node_budget=10**7, time_budget_ms=10**9, full_order_plies=full_order_plies
+        )
+        agent._reset_search_state(BLACK)
+        for depth in (1, 2, 3):
+            # iterative deepening on a warm table, as select_move does
+            _, value = agent._search_root(b, BLACK, depth, moves)
+            assert value == expected[depth - 1]
+
+
+def _minimax_after(board, move, depth):
+    board.push(move, BLACK)
+    value = _minimax(board, BLACK, WHITE, depth - 1)
+    board.pop()
+    return value
+
+
+def test_table_persists_across_moves_and_resets_on_colour_change():
+    b = Board(size=9)
+    b.place((4, 4), BLACK)
+    agent = AlphaBetaAgent(max_depth=2, node_budget=500, time_budget_ms=10**9)
+    b.place(agent.select_move(b, WHITE), WHITE)
+    filled = len(agent._tt)
+    assert filled > 0
+
+    b.place((3, 3), BLACK)
+    agent.select_move(b, WHITE)
+    assert agent._tt.generation == 2
+    assert len(agent._tt) >= filled
+
+    agent.select_move(b, BLACK)
+    assert agent._tt.generation == 3
+    assert agent._tt_stone == BLACK
+
+
+def test_aspiration_research_matches_full_window():
+    b = Board(size=7)
+    for move, stone in (((3, 3), BLACK), ((3, 4), WHITE), ((2, 2), BLACK), ((4, 4), WHITE)):
+        b.place(move, stone)
+    moves = b.candidate_moves()
+    expected = max(_minimax_after(b, move, 2) for move in moves)
+
+    # a tiny window around a bad guess forces fail-high/low re-searches
+    agent = AlphaBetaAgent(max_depth=2, node_budget=10**7, time_budget_ms=10**9, aspiration_window=1.0)
+    for guess in (expected - 500.0, expected + 500.0):
+        agent._reset_search_state(BLACK)
+        _, value = agent._search_aspiration(b, BLACK, 2, moves, guess)
+        assert value == expected
+
+
+def test_cheap_order_puts_killers_then_history_first():
+    agent = AlphaBetaAgent(full_order_plies=0)
+    agent._reset_search_state(BLACK)
+    moves = [(0, 0), (0, 1), (0, 2), (0, 3)]
+
+    agent._record_cutoff(BLACK, (0, 2), 1, 3)
+    agent._record_cutoff(BLACK, (0, 3), 2, 5)
+    agent._record_cutoff(WHITE, (0, 1), 3, 5)
+    assert agent._cheap_order(moves, BLACK, 3) == [(0, 2), (0, 3), (0, 0), (0, 1)]
+    assert agent._cheap_order(moves, BLACK, 5) == [(0, 1), (0, 3), (0, 2), (0, 0)]
+    assert agent._cheap_order(moves, WHITE, 4) == [(0, 1), (0, 0), (0, 2), (0, 3)]
+
+    # killers reset and history halves on the next move
+    agent._reset_search_state(BLACK)
+    assert agent._killer_slots(5) == []
+    assert agent._history == {(BLACK, (0, 3)): 2, (WHITE, (0, 1)): 4}
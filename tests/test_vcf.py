@@ -0,0 +1,62 @@
+from gomoku.board import Board, BLACK, WHITE
+
+from agents.ab_agent import AlphaBetaAgent
+from search.vcf import VCFSolver, window_points
+
+
+def test_window_points_finds_fours_and_fives():
+    b = Board(size=9)
+    for move in ((4, 1), (4, 2), (4, 3)):
+        b.place(move, BLACK)
+    b.place((4, 0), WHITE)
+    assert set(window_points(b, BLACK, 3)) == {4 * 9 + 4, 4 * 9 + 5}
+    assert not window_points(b, BLACK, 4)
+    b.place((4, 4), BLACK)
+    assert set(window_points(b, BLACK, 4)) == {4 * 9 + 5}
+
+
+def test_finds_multi_step_vcf_and_caches_it(vcf_board, assert_forced_win):
+    b = vcf_board
+    solver = VCFSolver()
+    sequence = solver.solve(b, BLACK)
+    assert len(sequence) == 5
+    assert_forced_win(b, BLACK, sequence)
+    assert solver.solve(b, WHITE) is None and solver.complete
+
+    assert solver.solve(b, BLACK) == sequence
+    assert solver.nodes == 1
+
+
+def test_defender_five_threat_restricts_attacker(vcf_board, assert_forced_win):
+    b = vcf_board
+    for move in ((12, 10), (12, 11), (12, 12), (12, 13)):
+        b.place(move, WHITE)
+    b.place((12, 14), BLACK)
+    # BLACK must block at (12, 9), which is not a four
+    assert VCFSolver().solve(b, BLACK) is None
+
+    # once the block is a four of its own, the search goes through it
+    for move in ((9, 9), (10, 9), (11, 9)):
+        b.place(move, BLACK)
+    sequence = VCFSolver().solve(b, BLACK)
+    assert sequence[0] == (12, 9)
+    assert_forced_win(b, BLACK, sequence)
+
+
+def test_budget_cutoff_is_not_cached(vcf_board):
+    b = vcf_board
+    solver = VCFSolver()
+    assert solver.solve(b, BLACK, max_nodes=1) is None
+    assert not solver.complete
+    assert len(solver) == 0
+    assert solver.solve(b, BLACK) is not None
+
+
+def test_agent_plays_and_stops_vcf(vcf_board):
+    b = vcf_board
+    agent = AlphaBetaAgent(max_depth=1, node_budget=100, time_budget_ms=10**6)
+    assert agent.select_move(b, BLACK) == (7, 7)
+
+    move = agent.select_move(b, WHITE)
+    b.place(move, WHITE)
+    assert VCFSolver().solve(b, BLACK) is None
@@ -0,0 +1,82 @@
+from gomoku.board import Board, BLACK, WHITE
+
+from agents.ab_agent import AlphaBetaAgent
+from heuristics.features import threat_moves
+from search.vcf import VCFSolver
+from search.vct import VCTSolver
+
+
+def _fork_board():
+    # BLACK (7,7) makes two open threes at once; there is no four to play
+    b = Board(size=15)
+    for move in ((7, 5), (7, 6), (5, 7), (6, 7)):
+        b.place(move, BLACK)
+    for move in ((0, 0), (0, 14), (14, 0), (14, 14)):
+        b.place(move, WHITE)
+    return b
+
+
+def _assert_line_wins(board, stone, line):
+    # replaying the line alternately ends with stone's five
+    other = WHITE if stone == BLACK else BLACK
+    c = board.copy()
+    for i, move in enumerate(line):
+        assert c.place(move, stone if i % 2 == 0 else other)
+    assert c.winner == stone
+
+
+def test_vct_finds_fork_that_vcf_cannot():
+    b = _fork_board()
+    assert VCFSolver().solve(b, BLACK) is None
+
+    solver = VCTSolver()
+    line = solver.solve(b, BLACK)
+    assert line[0] == (7, 7)
+    _assert_line_wins(b, BLACK, line)
+    assert solver.solve(b, WHITE) is None and solver.complete
+
+
+def test_vct_proves_continuous_fours(vcf_board, assert_forced_win):
+    b = vcf_board
+    line = VCTSolver().solve(b, BLACK)
+    assert_forced_win(b, BLACK, line)
+
+
+def test_vct_ignores_dead_threes():
+    # (2,6) would make O . X X X . O, which the defender can ignore in
+    # favour of the double-three point (4,6); it must not open a proof
+    b = Board(size=15)
+    for move in ((2, 4), (2, 5), (3, 6), (5, 5), (6, 4)):
+        b.place(move, BLACK)
+    for move in ((2, 2), (2, 8)):
+        b.place(move, WHITE)
+    assert threat_moves(b, BLACK, [(2, 6)]) == {}
+
+    line = VCTSolver().solve(b, BLACK)
+    assert line is None or line[0] != (2, 6)
+    if line is not None:
+        # every attacker move before the last is a live threat
+        c = b.copy()
+        for i, move in enumerate(line[:-1]):
+            if i % 2 == 0:
+                assert move in threat_moves(c, BLACK, [move])
+            assert c.place(move, BLACK if i % 2 == 0 else WHITE)
+        _assert_line_wins(b, BLACK, line)
+
+
+def test_vct_budget_and_cache():
+    b = _fork_board()
+    solver = VCTSolver()
+    assert solver.solve(b, BLACK, max_nodes=2) is None
+    assert not solver.complete
+
+    line = solver.solve(b, BLACK)
+    assert line is not None
+    assert solver.solve(b, BLACK) == line
+    assert solver.nodes == 1  # answered from the proof cache
+
+
+def test_agent_uses_vct_option():
+    b = _fork_board()
+    agent = AlphaBetaAgent(max_depth=1, node_budget=100, time_budget_ms=10**6, use_vct=True)
+    assert agent.select_move(b, BLACK) == (7, 7)
@@ -46,10 +46,20 @@ def board_from_grid(grid) -> Board:
             stone = _normalize_cell(row[c])
             if stone not in (EMPTY, BLACK, WHITE):
                 raise ValueError("invalid cell value")
-            b._grid[r][c] = stone
+            if stone != EMPTY:
+                # place keeps the board's cached winner in sync
+                b.place((r, c), stone)
+    b.last_move = None
     return b
 
 
+def board_from_packed(packed) -> Board:
+    if not isinstance(packed, str):
+        raise ValueError("packed must be a base64 string")
+    # size and length are checked before any board is built
+    return Board.from_base64(packed, expected_size=BOARD_SIZE)
+
+
 def infer_to_move(board: Board) -> str:
     black_n = sum(row.count(BLACK) for row in board._grid)
     white_n = sum(row.count(WHITE) for row in board._grid)
@@ -78,6 +88,7 @@ def state_payload(game: Game):
     over = game.is_over()
     return {
         "grid": grid_from_board(game.board),
+        "packed": game.board.to_base64(),
         "to_move": game.to_move,
         "winner": w,
         "game_over": over,
@@ -108,6 +119,7 @@ def api_new():
 def api_move():
     data = request.get_json(silent=True) or {}
     grid = data.get("grid")
+    packed = data.get("packed")
     human_side = (data.get("human_side") or "black").lower()
     move = data.get("move")
     client_to_move = data.get("to_move")
@@ -121,7 +133,10 @@ def api_move():
         return jsonify({"error": "move must be integers"}), 400
 
     try:
-        board = board_from_grid(grid)
+        if packed is not None:
+            board = board_from_packed(packed)
+        else:
+            board = board_from_grid(grid)
         inferred = infer_to_move(board)
         if client_to_move is not None and client_to_move != inferred:
             return jsonify({"error": "to_move does not match board state"}), 400
@@ -14,6 +14,8 @@ const coordColsEl = document.getElementById("coordCols");
 const coordRowsEl = document.getElementById("coordRows");
 
 let grid = [];
+/** Server's packed (base64) encoding of `grid`, sent back instead of the full grid. */
+let packed = null;
 let toMove = BLACK;
 let gameOver = false;
 let winner = null;
@@ -236,6 +238,7 @@ function applyServerState(data, opts = {}) {
   const humanCoord = opts.humanMove ?? null;
 
   grid = data.grid;
+  packed = data.packed ?? null;
   toMove = data.to_move;
   gameOver = !!data.game_over;
   winner = data.winner ?? null;
@@ -260,6 +263,7 @@ async function apiNew() {
   if (!res.ok) {
     setStatus(data.error || "Failed to start game.");
     grid = emptyGrid();
+    packed = null;
     gameOver = true;
     lastMove = null;
     winningCells = null;
@@ -297,7 +301,7 @@ async function handleCellClick(row, col) {
     method: "POST",
     headers: { "Content-Type": "application/json" },
     body: JSON.stringify({
-      grid: preMoveGrid,
+      ...(packed ? { packed } : { grid: preMoveGrid }),
       human_side: sideSelect.value,
       to_move: preMoveToMove,
       move: [r, c],